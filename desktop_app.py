@@ -1,16 +1,11 @@
 from __future__ import annotations
+import multiprocessing
+import os
 import threading
 import time
 import socket
 import webbrowser
 
-try:
-    import webview  # pywebview
-except Exception:
-    webview = None
-
-from src.app import app
-
 
 def _find_free_port(preferred: int = 5000) -> int:
     # Try preferred first
@@ -27,38 +22,63 @@ def _find_free_port(preferred: int = 5000) -> int:
         return s.getsockname()[1]
 
 
-def _run_server(port: int) -> None:
-    # Use Flask's built-in server in a thread for simplicity.
-    # For production stability you can switch to waitress.
+def _run_server(app, port: int) -> None:
+    # Serve with waitress; size the thread pool so /download and static assets stay
+    # responsive while long report generation requests are running.
     try:
         from waitress import serve
-        serve(app, host="127.0.0.1", port=port)
+        serve(
+            app,
+            host="127.0.0.1",
+            port=port,
+            threads=max(8, (os.cpu_count() or 4) * 2),
+            connection_limit=200,
+            channel_timeout=120,
+        )
     except Exception:
         # Fallback to Flask dev server if waitress unavailable
         app.run(host="127.0.0.1", port=port, debug=False, use_reloader=False)
 
 
+def _wait_for_server(port: int, timeout: float = 5.0) -> bool:
+    """Poll until the server accepts TCP connections (or timeout). Returns True when up."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return True
+        time.sleep(0.02)
+    return False
+
+
 def main() -> None:
+    # Imported here, not at module level: PDF pool workers re-import this script and
+    # must not load the input data themselves
+    from src.app import app
+
     port = _find_free_port(5000)
-    server_th = threading.Thread(target=_run_server, args=(port,), daemon=True)
+    server_th = threading.Thread(target=_run_server, args=(app, port), daemon=True)
     server_th.start()
 
     url = f"http://127.0.0.1:{port}"
 
-    # Optionally wait a moment for server to start
-    time.sleep(0.5)
+    # Wait until the server is actually listening instead of a fixed delay
+    _wait_for_server(port)
 
-    if webview is not None:
-        try:
-            webview.create_window("Generator raportów PDF", url)
-            webview.start()
-            return
-        except Exception:
-            pass
+    # pywebview pulls in native GUI bindings; import it only when opening the window
+    try:
+        import webview  # pywebview
+        webview.create_window("Generator raportów PDF", url)
+        webview.start()
+        return
+    except Exception:
+        pass
 
     # Fallback: open in default browser
     webbrowser.open(url)
 
 
 if __name__ == "__main__":
+    # Required for the PDF process pool in the PyInstaller build
+    multiprocessing.freeze_support()
     main()
@@ -1,15 +1,18 @@
 from __future__ import annotations
 import os
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
 
 from src.report import (
     load_config,
-    load_csv,
+    load_csv_chunks,
     filter_by_sources,
     ReportBuilder,
     CSV_COLUMNS,
     load_uom_lookup,
     apply_uom_lookup,
+    render_pdf,
 )
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -17,6 +20,7 @@ INPUT_CSV = os.path.join(BASE_DIR, 'ex_input.csv')
 CONFIG_JSON = os.path.join(BASE_DIR, 'config.json')
 OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
 
+
 if __name__ == '__main__':
     import argparse
     ap = argparse.ArgumentParser()
@@ -25,19 +29,30 @@ if __name__ == '__main__':
     args = ap.parse_args()
 
     cfg = load_config(CONFIG_JSON)
-    df = load_csv(INPUT_CSV)
-    # Apply unit mapping from output/Jednostki.csv if present
-    uom_lookup_path = os.path.join(OUTPUT_DIR, 'Jednostki.csv')
-    df = apply_uom_lookup(df, load_uom_lookup(uom_lookup_path))
-    df_s = filter_by_sources(df, [args.source])
     reporter = ReportBuilder(cfg)
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
     doc_col = CSV_COLUMNS["doc_no"]
+    # Only the selected source (and document) is kept, so read the CSV in chunks and filter each
+    parts = []
+    for chunk in load_csv_chunks(INPUT_CSV):
+        if args.doc:
+            if doc_col not in chunk.columns:
+                raise SystemExit("Brak kolumny 'Nr dokumentu' w CSV")
+            # Narrow to the document first; the source filter then only scans its rows
+            chunk = chunk[chunk[doc_col] == args.doc]
+        parts.append(filter_by_sources(chunk, [args.source]))
+    if not parts:
+        raise SystemExit("Plik CSV jest pusty")
+    df_s = pd.concat(parts)
+    # Apply unit mapping from output/Jednostki.csv if present (only to the rows we render)
+    uom_lookup_path = os.path.join(OUTPUT_DIR, 'Jednostki.csv')
+    lookup = load_uom_lookup(uom_lookup_path)
+    if lookup:
+        df_s = apply_uom_lookup(df_s, lookup)
+
     if args.doc:
-        if doc_col not in df_s.columns:
-            raise SystemExit("Brak kolumny 'Nr dokumentu' w CSV")
-        df_doc = df_s[df_s[doc_col] == args.doc]
+        df_doc = df_s
         rows = reporter.build_rows_for_document(df_doc)
         _, doc_date = reporter.infer_doc_header(df_doc)
         header = {"document_no": args.doc, "document_date": doc_date}
@@ -47,13 +62,23 @@ if __name__ == '__main__':
         print(f'Wygenerowano: {out}')
     else:
         count = 0
+        # Aggregate the lines of all documents in one groupby; workers only lay out the PDFs
+        rows_by_doc = reporter.build_rows_grouped(df_s)
+        # PDF layout is CPU-bound pure Python; render documents in parallel processes
+        outs, rows_list, headers = [], [], []
         for doc_no, df_doc in df_s.groupby(doc_col):
-            rows = reporter.build_rows_for_document(df_doc)
             _, doc_date = reporter.infer_doc_header(df_doc)
-            header = {"document_no": doc_no, "document_date": doc_date}
+            headers.append({"document_no": doc_no, "document_date": doc_date})
             safe_doc = str(doc_no).replace('/', '_')
-            out = os.path.join(OUTPUT_DIR, f'raport_{safe_doc}.pdf')
-            reporter.generate_pdf(out, rows, header)
-            print(f'Wygenerowano: {out}')
-            count += 1
+            outs.append(os.path.join(OUTPUT_DIR, f'raport_{safe_doc}.pdf'))
+            rows_list.append(rows_by_doc.get(doc_no, []))
+        if outs:
+            # 61: ProcessPoolExecutor rejects more workers on Windows
+            workers = min(os.cpu_count() or 1, 61, len(outs))
+            # Batch several small documents per task to cut pickling/IPC round trips
+            chunksize = max(1, len(outs) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                for out in ex.map(render_pdf, [cfg] * len(outs), outs, rows_list, headers, chunksize=chunksize):
+                    print(f'Wygenerowano: {out}')
+                    count += 1
         print(f'Łącznie plików: {count}')
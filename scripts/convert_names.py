@@ -17,7 +17,7 @@ def convert_customer_names():
 
     try:
         # Odczytaj plik jako Excel, ponieważ jest to plik .xlsx z błędnym rozszerzeniem
-        df = pd.read_excel(source_path)
+        df = pd.read_excel(source_path, engine="calamine")
         
         # Zapisz go jako poprawny plik CSV z kodowaniem UTF-8
         df.to_csv(destination_path, index=False, encoding='utf-8-sig')
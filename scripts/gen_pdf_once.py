@@ -20,11 +20,13 @@ def main():
 
     # Apply units mapping from output/Jednostki.csv when available
     lookup_csv = os.path.join(output_dir, 'Jednostki.csv')
-    apply_uom_lookup(df, load_uom_lookup(lookup_csv))
+    lookup = load_uom_lookup(lookup_csv)
+    if lookup:
+        apply_uom_lookup(df, lookup)
 
     doc = 'WD/25/31995'
     col_doc = CSV_COLUMNS['doc_no']
-    sub = df[df[col_doc] == doc].copy()
+    sub = df[df[col_doc] == doc]
     rb = ReportBuilder(cfg)
     rows = rb.build_rows_for_document(sub)
 
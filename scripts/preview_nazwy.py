@@ -16,7 +16,7 @@ def main():
         raise SystemExit(f"File not found: {p}")
 
     print(f"Reading Excel content from: {p}")
-    xl = pd.ExcelFile(p, engine="openpyxl")
+    xl = pd.ExcelFile(p, engine="calamine")
     print("Sheets:", ", ".join(xl.sheet_names))
 
     sheet = args.sheet or xl.sheet_names[0]
@@ -0,0 +1,95 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+# Add project root to the path to allow importing from src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.report import ReportBuilder, load_uom_lookup, _parse_date_any, _parse_dates_series, _to_float, _to_float_series
+
+
+class TestFormatting(unittest.TestCase):
+
+    def test_format_qty_pl_series_matches_scalar(self):
+        """Vectorized quantity formatting must match _format_qty_pl value by value."""
+        values = [0, 1, 1234, 1234567.0, 2.5, 0.125, 1.0004, 1234.5678, 0.1 + 0.2, 999.99999999999]
+        expected = [ReportBuilder._format_qty_pl(v) for v in values]
+        self.assertEqual(ReportBuilder.format_qty_pl_series(pd.Series(values)).tolist(), expected)
+        self.assertEqual(expected[2], '1 234')
+        self.assertEqual(expected[4], '2,5')
+
+    def test_format_date_pl_series(self):
+        dates = pd.Series([pd.Timestamp('2025-11-21'), None])
+        self.assertEqual(ReportBuilder.format_date_pl_series(dates).tolist(), ['21.11.2025', ''])
+        self.assertEqual(ReportBuilder.format_date_pl_series(pd.to_datetime(dates)).tolist(), ['21.11.2025', ''])
+
+
+
+class TestDateParsing(unittest.TestCase):
+
+    def test_parse_dates_series_matches_scalar(self):
+        """Vectorized column parsing must give what _parse_date_any gives per cell."""
+        values = ['11/21/2025', '3/1/2026', ' 3/1/2026 ', '13/01/2025', '2/30/2025', '1/2/25',
+                  '2025-11-17', '2025-1-5', '2025-02-30', '20251221', '20251340', '26.02.2026', '', 'abc',
+                  '11/21/2025 10:30', '2025-11-17 10:30']
+        parsed = _parse_dates_series(pd.Series(values, dtype=object))
+        for value, got in zip(values, parsed):
+            expected = _parse_date_any(value)
+            if expected is None:
+                self.assertTrue(pd.isna(got), value)
+            else:
+                self.assertEqual(got, expected, value)
+
+
+class TestQuantityParsing(unittest.TestCase):
+
+    def test_to_float_series_matches_scalar(self):
+        """Vectorized quantity coercion must give what _to_float gives per cell."""
+        values = ['12', '-3.5', ' 1 234 ', '"7"', '2,5', '-2,000', '1\u00a0234,5', '2,000,5',
+                  '1,2345', ',5', '5,', '', 'abc', '1_000', '1,2,3']
+        parsed = _to_float_series(pd.Series(values, dtype=object)).tolist()
+        self.assertEqual(parsed, [_to_float(v) for v in values])
+        self.assertEqual(parsed[5], -2000.0)
+        self.assertEqual(parsed[4], 2.5)
+
+
+class TestUomLookup(unittest.TestCase):
+
+    def test_variants_and_precedence(self):
+        """Padded variants are added, a real code beats a variant and the first variant wins."""
+        rows = ["Nr,Podst. jednostka miary", "3773,kg", "Z03773,szt", "12345,litr", "Z04444,g", "04444,ml", "Z01111,kg", "1111,szt",
+                "05555,kg", "5555,szt"]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'Jednostki.csv')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(rows) + '\n')
+            lookup = load_uom_lookup(path)
+        self.assertEqual(lookup['3773'], 'KG')
+        self.assertEqual(lookup['Z03773'], 'SZT')
+        self.assertEqual(lookup['Z12345'], 'L')
+        self.assertEqual(lookup['4444'], 'G')
+        self.assertEqual(lookup['04444'], 'ML')
+        self.assertEqual(lookup['1111'], 'SZT')
+        self.assertEqual(lookup['01111'], 'KG')
+        self.assertEqual(lookup['Z05555'], 'KG')
+
+    def test_reloads_changed_file(self):
+        """The cached mapping is reused for an unchanged file and re-read once the file changes."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'Jednostki.csv')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("Nr,Podst. jednostka miary\n3773,kg\n")
+            first = load_uom_lookup(path)
+            self.assertIs(load_uom_lookup(path), first)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("Nr,Podst. jednostka miary\n3773,litr\n")
+            st = os.stat(path)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+            self.assertEqual(load_uom_lookup(path)['3773'], 'L')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,11 +16,12 @@ def main():
 
     df = load_csv(input_csv)
     lookup = load_uom_lookup(lookup_csv)
-    apply_uom_lookup(df, lookup)
+    if lookup:
+        apply_uom_lookup(df, lookup)
 
     doc = 'WD/25/31995'
     col_doc = CSV_COLUMNS['doc_no']
-    sub = df[df[col_doc] == doc].copy()
+    sub = df[df[col_doc] == doc]
     rb = ReportBuilder({'title': 't'})
     rows = rb.build_rows_for_document(sub)
     print('rows:', len(rows))
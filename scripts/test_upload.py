@@ -0,0 +1,54 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to the path to allow importing from src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import app as app_module
+
+
+class TestUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_csv = os.path.join(self.tmp.name, 'current_input.csv')
+        with open(os.path.join(os.path.dirname(__file__), '..', 'ex_input.csv'), encoding='utf-8-sig') as f:
+            self.lines = f.read().splitlines(keepends=True)
+        self.original = ''.join(self.lines[:3]).encode('utf-8-sig')
+        with open(self.input_csv, 'wb') as f:
+            f.write(self.original)
+        self.client = app_module.app.test_client()
+
+    def tearDown(self):
+        # Successful uploads reload the module state from the patched path; load the real input again
+        app_module._load_input_keyed.cache_clear()
+        app_module._reload_data()
+        self.tmp.cleanup()
+
+    def _upload(self, name: str, data: bytes):
+        with patch('src.app.INPUT_CSV', self.input_csv):
+            return self.client.post('/upload', data={'input_file': (io.BytesIO(data), name)},
+                                    content_type='multipart/form-data')
+
+    def test_unparsable_csv_keeps_current_input(self):
+        """A CSV that load_csv rejects must not replace (or leave a tmp file beside) the input."""
+        self._upload('bad.csv', b'a,b\n1,2,3,4\n"unterminated\n')
+        with open(self.input_csv, 'rb') as f:
+            self.assertEqual(f.read(), self.original)
+        self.assertEqual(os.listdir(self.tmp.name), ['current_input.csv'])
+
+    def test_valid_csv_replaces_input(self):
+        """cp1250 uploads are stored as UTF-8-SIG once they parse."""
+        text = self.lines[0] + ''.join(self.lines[3:5])
+        self._upload('ok.csv', text.encode('cp1250'))
+        with open(self.input_csv, 'rb') as f:
+            self.assertEqual(f.read(), text.encode('utf-8-sig'))
+        self.assertEqual(os.listdir(self.tmp.name), ['current_input.csv'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,38 +1,63 @@
 from __future__ import annotations
 import os
 import sys
-from typing import List, Dict, Any
+import codecs
+import csv
+import functools
+import hashlib
+import json
+import multiprocessing
+import pickle
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Tuple, FrozenSet, Mapping, Callable
 
 from flask import Flask, render_template, request, send_from_directory, redirect, url_for, flash
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.utils import secure_filename
 
 import pandas as pd
 
+try:
+    import orjson  # optional: faster JSON for the large /generate-final payload
+except ImportError:
+    orjson = None
+
 try:
     # When imported as a package (e.g., from desktop wrapper / PyInstaller)
     from .report import (
-        load_config,
         load_csv,
         unique_sources,
-        filter_by_sources,
+        group_by_document,
+        documents_by_source,
         load_uom_lookup,
+        find_uom_lookup_file,
         apply_uom_lookup,
         ReportBuilder,
         ReportRow,
+        render_pdf,
+        find_logo_file,
         CSV_COLUMNS,
+        NO_EXPIRY_ITEM_NO,
         _parse_date_any,
     )
 except Exception:  # fallback for running as a script: python src/app.py
     from report import (
-        load_config,
         load_csv,
         unique_sources,
-        filter_by_sources,
+        group_by_document,
+        documents_by_source,
         load_uom_lookup,
+        find_uom_lookup_file,
         apply_uom_lookup,
         ReportBuilder,
         ReportRow,
+        render_pdf,
+        find_logo_file,
         CSV_COLUMNS,
+        NO_EXPIRY_ITEM_NO,
         _parse_date_any,
     )
 
@@ -71,11 +96,15 @@ CONFIG_JSON = os.path.join(USER_DATA_DIR, 'config.json')
 BASE_CUSTOMERS_JSON = os.path.join(USER_DATA_DIR, 'base_customers.json')
 OUTPUT_DIR = os.path.join(USER_DATA_DIR, 'output')
 INPUT_CSV = os.path.join(USER_DATA_DIR, 'current_input.csv')  # User uploads here
+STARTUP_CACHE = os.path.join(OUTPUT_DIR, '.startup_cache')  # Parsed input (frozen builds only)
+STARTUP_CACHE_KEY = STARTUP_CACHE + '.key'
+PDF_KEYS_INDEX = os.path.join(OUTPUT_DIR, '.pdf_keys.json')  # {PDF filename: cache key} of generated PDFs
 
 # Shared directories (all users)
 SHARED_DATA_DIR = _shared_data_dir()
 UOM_CSV = os.path.join(SHARED_DATA_DIR, 'Jednostki.csv')
 CUSTOMER_NAMES_CSV = os.path.join(SHARED_DATA_DIR, 'NazwyKlienci.csv')
+CUSTOMER_NAMES_FALLBACK_CSV = os.path.join(OUTPUT_DIR, 'NazwyKlienci.csv')  # dev environment
 
 # Bundled resources
 TEMPLATES_DIR = _resource_path('templates')
@@ -83,105 +112,276 @@ STATIC_DIR = _resource_path('static')
 
 app = Flask(__name__, template_folder=TEMPLATES_DIR, static_folder=STATIC_DIR, static_url_path='/static')
 app.secret_key = 'dev-secret-key'  # replace via env for production
+# Let the browser cache static assets (logo, css) instead of re-fetching them on every page
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 86400
+
+
+class _OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson; types orjson rejects go through the default provider."""
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def dumps(self, obj, **kwargs):
+        try:
+            # Sorted keys like DefaultJSONProvider, so responses stay identical
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode('utf-8')
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+
+if orjson is not None:
+    app.json = _OrjsonProvider(app)
 
 # Ensure user directories exist and seed config if needed
 def _ensure_data_files() -> None:
-    # Create user data directories
-    os.makedirs(USER_DATA_DIR, exist_ok=True)
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    # Create user data directories (output/ lives inside the user data dir, so one call
+    # creates both); after the first run this is a single stat per directory
+    if not os.path.isdir(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
     
     # Seed config.json if missing
     if not os.path.exists(CONFIG_JSON):
-        src = _resource_path('config.json')
-        if os.path.exists(src):
-            try:
-                import shutil
-                shutil.copyfile(src, CONFIG_JSON)
-            except Exception:
-                pass
+        try:
+            # A real copy, not a hardlink: the seeded config is user-editable and must not
+            # write through to the bundled file. copyfile already uses the platform's
+            # fast-copy path (sendfile on Linux, fcopyfile on macOS) where available.
+            # A missing bundled config simply raises here.
+            shutil.copyfile(_resource_path('config.json'), CONFIG_JSON)
+        except Exception:
+            pass
     
     # Create shared data directory (installer will populate with Jednostki.csv, NazwyKlienci.csv)
-    os.makedirs(SHARED_DATA_DIR, exist_ok=True)
+    if not os.path.isdir(SHARED_DATA_DIR):
+        os.makedirs(SHARED_DATA_DIR, exist_ok=True)
+
+
+def _file_stamp(path: str) -> Tuple[float, int]:
+    """(mtime, size) of a file used as a cache key; (0.0, -1) when it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0.0, -1
+    return st.st_mtime, st.st_size
+
+
+InputData = Tuple[pd.DataFrame, List[str], Mapping[str, pd.DataFrame], Dict[str, List[str]]]
+
+_STARTUP_CACHE_VERSION = 5
+
+
+def _build_input_data(df: pd.DataFrame) -> InputData:
+    return df, unique_sources(df), group_by_document(df), documents_by_source(df)
+
+
+def _read_startup_cache(key: Tuple[Any, ...]) -> Optional[pd.DataFrame]:
+    """Returns the cached normalized DataFrame if it was written for exactly this key."""
+    if not getattr(sys, 'frozen', False):
+        return None
+    try:
+        with open(STARTUP_CACHE_KEY, 'rb') as f:
+            stored_key, fmt = pickle.load(f)
+        if stored_key != key:
+            return None
+        if fmt == 'parquet':
+            return pd.read_parquet(STARTUP_CACHE)
+        return pd.read_pickle(STARTUP_CACHE)
+    except Exception:
+        # Missing, truncated or written by another pandas version - just re-parse
+        return None
+
+
+def _write_startup_cache(key: Tuple[Any, ...], df: pd.DataFrame) -> None:
+    """Only the DataFrame is stored: rebuilding the per-document indices is much cheaper
+    than unpickling one frame per document. Parquet when pyarrow is available, else pickle."""
+    if not getattr(sys, 'frozen', False):
+        return
+    tmp = STARTUP_CACHE + '.tmp'
+    try:
+        try:
+            df.to_parquet(tmp)
+            fmt = 'parquet'
+        except ImportError:
+            df.to_pickle(tmp, protocol=5)
+            fmt = 'pickle'
+        os.replace(tmp, STARTUP_CACHE)
+        # Key goes last: a crash in between leaves an old key that no longer matches
+        with open(STARTUP_CACHE_KEY, 'wb') as f:
+            pickle.dump((key, fmt), f, protocol=5)
+    except Exception:
+        pass
+
+
+@functools.lru_cache(maxsize=4)
+def _load_input_keyed(input_path: str, input_stamp: Tuple[float, int], uom_path: str,
+                      uom_stamp: Tuple[float, int]) -> InputData:
+    """Parse input CSV, apply the UOM lookup, collect sources and build per-document indices.
+    Memoized on both files' (mtime, size) so unchanged inputs are not re-parsed; frozen
+    builds also keep the normalized frame on disk so a cold start skips the CSV parse.
+    """
+    key = (_STARTUP_CACHE_VERSION, input_path, input_stamp, uom_path, uom_stamp)
+    cached = _read_startup_cache(key)
+    if cached is not None:
+        return _build_input_data(cached)
+    df = load_csv(input_path)
+    # Apply UOM lookup from shared Jednostki.csv (skipped when the file is missing/empty)
+    lookup = load_uom_lookup(uom_path)
+    if lookup:
+        df = apply_uom_lookup(df, lookup)
+    _write_startup_cache(key, df)
+    return _build_input_data(df)
+
+
+def _load_input_data() -> InputData:
+    """Returns (DF, SOURCES, DF_BY_DOC, DOCS_BY_SOURCE) for the current input CSV,
+    reusing the cached parse when possible."""
+    if not os.path.exists(INPUT_CSV):
+        # No data loaded yet - user needs to upload first
+        return pd.DataFrame(), [], {}, {}
+    # Key on the Jednostki.csv actually used (may be one of the fallback locations)
+    uom_path = find_uom_lookup_file(UOM_CSV) or UOM_CSV
+    return _load_input_keyed(INPUT_CSV, _file_stamp(INPUT_CSV), uom_path, _file_stamp(uom_path))
+
+
+@functools.lru_cache(maxsize=4)
+def _read_customer_names(path: str, stamp: Tuple[float, int]) -> Dict[str, str]:
+    # Tiny two-column file: the stdlib csv reader is much cheaper than pandas here
+    try:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            if 'Nr' in header and 'Nazwa szukana' in header:
+                i_nr = header.index('Nr')
+                i_name = header.index('Nazwa szukana')
+                width = max(i_nr, i_name) + 1
+                names: Dict[str, str] = {}
+                for row in reader:
+                    if not row:
+                        continue  # blank line
+                    if len(row) < width:
+                        row = row + [''] * (width - len(row))
+                    names[row[i_nr]] = row[i_name]
+                return names
+            else:
+                return {}
+    except Exception:
+        return {}
 
 
 def _load_customer_names() -> Dict[str, str]:
     """Loads customer name mapping from shared NazwyKlienci.csv"""
     if not os.path.exists(CUSTOMER_NAMES_CSV):
         # Fallback for dev environment
-        fallback = os.path.join(_user_data_dir(), 'output', 'NazwyKlienci.csv')
-        if os.path.exists(fallback):
-            path = fallback
+        if os.path.exists(CUSTOMER_NAMES_FALLBACK_CSV):
+            path = CUSTOMER_NAMES_FALLBACK_CSV
         else:
             return {}
     else:
         path = CUSTOMER_NAMES_CSV
-    
+    return _read_customer_names(path, _file_stamp(path))
+
+
+def _read_json(path: str) -> Any:
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw.decode('utf-8'))
+
+
+@functools.lru_cache(maxsize=4)
+def _read_config(path: str, stamp: Tuple[float, int]) -> Dict[str, Any]:
+    return _read_json(path)
+
+
+def _load_config() -> Dict[str, Any]:
+    """Loads config.json, re-parsing only when the file's (mtime, size) changed."""
+    return _read_config(CONFIG_JSON, _file_stamp(CONFIG_JSON))
+
+
+@functools.lru_cache(maxsize=4)
+def _read_base_customers(path: str, stamp: Tuple[float, int]) -> List[str]:
     try:
-        df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
-        if 'Nr' in df.columns and 'Nazwa szukana' in df.columns:
-            return dict(zip(df['Nr'], df['Nazwa szukana']))
-        else:
-            return {}
+        return _read_json(path).get('base_customers', [])
     except Exception:
-        return {}
+        return []
+
 
 def _load_base_customers() -> List[str]:
     """Loads list of base customer IDs from base_customers.json"""
     if not os.path.exists(BASE_CUSTOMERS_JSON):
         return []
-    try:
-        import json
-        with open(BASE_CUSTOMERS_JSON, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get('base_customers', [])
-    except Exception:
-        return []
+    return _read_base_customers(BASE_CUSTOMERS_JSON, _file_stamp(BASE_CUSTOMERS_JSON))
 
 def _save_base_customers(customer_ids: List[str]) -> None:
-    """Saves list of base customer IDs to base_customers.json"""
+    """Saves list of base customer IDs to base_customers.json (skipped when unchanged).
+    Written to a tmp file and swapped in with os.replace, so a crash never leaves a torn file.
+    """
+    if os.path.exists(BASE_CUSTOMERS_JSON) and _load_base_customers() == customer_ids:
+        return
+    data = {'base_customers': customer_ids}
+    tmp = BASE_CUSTOMERS_JSON + '.tmp'
     try:
-        import json
-        with open(BASE_CUSTOMERS_JSON, 'w', encoding='utf-8') as f:
-            json.dump({'base_customers': customer_ids}, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        else:
+            payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, BASE_CUSTOMERS_JSON)
     except Exception:
         pass
 
+# Under `python src/app.py` the spawned PDF workers re-run this script as __mp_main__.
+# They only call report.render_pdf, so they skip the data loading and keep empty state.
+_IN_PDF_WORKER = __name__ == '__mp_main__'
+
 # Call once on import
-_ensure_data_files()
+if not _IN_PDF_WORKER:
+    _ensure_data_files()
 
 # Load data at startup
-CONFIG: Dict[str, Any] = load_config(CONFIG_JSON)
+CONFIG: Dict[str, Any] = _load_config() if not _IN_PDF_WORKER else {}
 
 # Load input CSV if exists, otherwise create empty DataFrame
-if os.path.exists(INPUT_CSV):
-    DF: pd.DataFrame = load_csv(INPUT_CSV)
-    # Apply UOM lookup from shared Jednostki.csv
-    DF = apply_uom_lookup(DF, load_uom_lookup(UOM_CSV))
-    SOURCES: List[str] = unique_sources(DF)
+DF: pd.DataFrame
+SOURCES: List[str]
+DF_BY_DOC: Mapping[str, pd.DataFrame]  # Nr dokumentu -> rows of that document
+DOCS_BY_SOURCE: Dict[str, List[str]]  # Nr źródła -> sorted document numbers
+if _IN_PDF_WORKER:
+    DF, SOURCES, DF_BY_DOC, DOCS_BY_SOURCE = pd.DataFrame(), [], {}, {}
 else:
-    # No data loaded yet - user needs to upload first
-    DF = pd.DataFrame()
-    SOURCES = []
+    DF, SOURCES, DF_BY_DOC, DOCS_BY_SOURCE = _load_input_data()
 
-CUSTOMER_NAMES: Dict[str, str] = _load_customer_names()
-BASE_CUSTOMERS: List[str] = _load_base_customers()
+CUSTOMER_NAMES: Dict[str, str] = _load_customer_names() if not _IN_PDF_WORKER else {}
+BASE_CUSTOMERS: List[str] = _load_base_customers() if not _IN_PDF_WORKER else []
+BASE_CUSTOMERS_SET: FrozenSet[str] = frozenset(BASE_CUSTOMERS)  # O(1) membership for filtering/sorting
 REPORTER = ReportBuilder(CONFIG)
 
 
+def _source_names(sources: List[str], names: Dict[str, str]) -> Dict[str, str]:
+    """Display name per source (falls back to the source number)."""
+    return {s: names.get(s, s) for s in sources}
+
+
+def _ids_sorted_by_name(names: Dict[str, str]) -> List[str]:
+    """Customer ids ordered alphabetically by display name (case-insensitive)."""
+    return sorted(names, key=lambda cid: names.get(cid, cid).upper())
+
+
+# Derived lookups, rebuilt only when the data is reloaded (not per request)
+SOURCE_NAMES_ALL: Dict[str, str] = _source_names(SOURCES, CUSTOMER_NAMES)
+CUSTOMER_NAMES_SORTED_IDS: List[str] = _ids_sorted_by_name(CUSTOMER_NAMES)
+
+
 def _reload_data() -> None:
-    global CONFIG, DF, SOURCES, REPORTER, CUSTOMER_NAMES, BASE_CUSTOMERS
-    CONFIG = load_config(CONFIG_JSON)
-    
-    if os.path.exists(INPUT_CSV):
-        DF = load_csv(INPUT_CSV)
-        DF = apply_uom_lookup(DF, load_uom_lookup(UOM_CSV))
-        SOURCES = unique_sources(DF)
-    else:
-        DF = pd.DataFrame()
-        SOURCES = []
-    
+    global CONFIG, DF, SOURCES, DF_BY_DOC, DOCS_BY_SOURCE, REPORTER, CUSTOMER_NAMES, BASE_CUSTOMERS, BASE_CUSTOMERS_SET
+    global SOURCE_NAMES_ALL, CUSTOMER_NAMES_SORTED_IDS
+    CONFIG = _load_config()
+    DF, SOURCES, DF_BY_DOC, DOCS_BY_SOURCE = _load_input_data()
     CUSTOMER_NAMES = _load_customer_names()
+    SOURCE_NAMES_ALL = _source_names(SOURCES, CUSTOMER_NAMES)
+    CUSTOMER_NAMES_SORTED_IDS = _ids_sorted_by_name(CUSTOMER_NAMES)
     BASE_CUSTOMERS = _load_base_customers()
+    BASE_CUSTOMERS_SET = frozenset(BASE_CUSTOMERS)
     REPORTER = ReportBuilder(CONFIG)
 
 
@@ -198,10 +398,9 @@ def index():
     # Filter sources based on base customers (if defined)
     filtered_sources = SOURCES
     if BASE_CUSTOMERS:
-        filtered_sources = [s for s in SOURCES if s in BASE_CUSTOMERS]
+        filtered_sources = [s for s in SOURCES if s in BASE_CUSTOMERS_SET]
     
-    source_names = {s: CUSTOMER_NAMES.get(s, s) for s in filtered_sources}
-    return render_template('index.html', sources=filtered_sources, source_names=source_names)
+    return render_template('index.html', sources=filtered_sources, source_names=SOURCE_NAMES_ALL)
 
 
 @app.route('/preview', methods=['GET'])
@@ -217,50 +416,186 @@ def preview():
         flash('Brak wybranych źródeł.')
         return redirect(url_for('index'))
     
-    # Generate preview data for all documents
-    df_sources = filter_by_sources(DF, selected)
-    doc_col = CSV_COLUMNS["doc_no"]
+    # Generate preview data for all documents (looked up in the prebuilt per-document index)
     source_col = CSV_COLUMNS["source_no"]
+    name_col = CSV_COLUMNS["name"]
+    lot_col = CSV_COLUMNS["lot_no"]
+    exp_col = CSV_COLUMNS["expiry"]
+    qty_col = CSV_COLUMNS["qty"]
+    item_col = CSV_COLUMNS["item_no"]
+    selected_set = set(selected)
+    doc_nos = sorted({d for s in selected_set for d in DOCS_BY_SOURCE.get(s, [])})
     
-    documents = []
-    for doc_no, df_doc in df_sources.groupby(doc_col):
-        rows = REPORTER.build_rows_for_document(df_doc)
+    doc_col = CSV_COLUMNS["doc_no"]
+    headers = []
+    frames = []
+    for doc_no in doc_nos:
+        df_doc = DF_BY_DOC[doc_no]
+        in_selected = df_doc[source_col].isin(selected_set)
+        if not in_selected.all():
+            # Document shared with a non-selected source: keep only the selected rows
+            df_doc = df_doc[in_selected]
         _, doc_date = REPORTER.infer_doc_header(df_doc)
         
         # Get customer name from source number mapping
         customer_name = ""
         if source_col in df_doc.columns:
             source_no = next((str(v).strip() for v in df_doc[source_col].tolist() if str(v).strip()), "")
-            customer_name = CUSTOMER_NAMES.get(source_no, source_no)
-        
-        # Convert rows to dict format for JSON/template
-        rows_data = []
-        for r in rows:
-            # Special handling for z00155: show "nie dotyczy"
-            if r.item_no.lower() == "z00155":
-                exp_str = 'nie dotyczy'
-            else:
-                exp_str = REPORTER._format_date_pl(r.expiry) if r.expiry else ''
-            rows_data.append({
-                'lp': r.lp,
-                'name': r.name,
-                'qty': REPORTER._format_qty_pl(r.qty),
-                'uom': r.uom,
-                'lot_no': r.lot_no,
-                'expiry': exp_str,
-                'item_no': r.item_no
-            })
-        
-        documents.append({
+            # Display names for all known sources are precomputed on reload
+            customer_name = SOURCE_NAMES_ALL.get(source_no) or CUSTOMER_NAMES.get(source_no, source_no)
+        headers.append((doc_no, doc_date, customer_name))
+        frames.append(df_doc)
+    
+    # Aggregate and format the lines of all documents at once, then split them per document
+    rows_by_doc: Dict[str, List[Dict[str, Any]]] = {}
+    if frames:
+        g = REPORTER.documents_frame(pd.concat(frames))
+        item_no = g[item_col]
+        # Special handling for z00155: show "nie dotyczy"
+        exp_str = REPORTER.format_date_pl_series(g[exp_col]).where(item_no.str.casefold() != NO_EXPIRY_ITEM_NO, 'nie dotyczy')
+        rows_all = pd.DataFrame({
+            'lp': g.groupby(doc_col, sort=False).cumcount() + 1,
+            'name': g[name_col],
+            'qty': REPORTER.format_qty_pl_series(g[qty_col]),
+            'uom': g['__UOM__'],
+            'lot_no': g[lot_col],
+            'expiry': exp_str,
+            'item_no': item_no,
+        })
+        for doc_no, part in rows_all.groupby(g[doc_col], sort=False):
+            rows_by_doc[doc_no] = part.to_dict('records')
+    
+    documents = [
+        {
             'doc_no': doc_no,
             'doc_date': doc_date,
             'customer_name': customer_name,
-            'rows': rows_data
-        })
+            'rows': rows_by_doc.get(doc_no, []),
+        }
+        for doc_no, doc_date, customer_name in headers
+    ]
     
     return render_template('preview.html', documents=documents, sources=sources_param)
 
 
+# Bump when the PDF layout/rendering changes, so PDFs from an older version are not reused
+_PDF_RENDER_VERSION = 1
+
+
+def _pdf_render_stamp() -> str:
+    """Everything besides the edited rows that decides how a PDF looks: the config the
+    renderer uses, the logo file version, the resolved fonts and the renderer version."""
+    logo = find_logo_file(CONFIG)
+    logo_mtime, logo_size = _file_stamp(logo) if logo else (0.0, -1)
+    config = json.dumps(CONFIG, sort_keys=True, ensure_ascii=False)
+    return f"{_PDF_RENDER_VERSION}|{config}|{logo}|{logo_mtime}|{logo_size}|{REPORTER.font_regular}|{REPORTER.font_bold}"
+
+
+def _pdf_cache_key(doc_data: Dict[str, Any], render_stamp: str) -> str:
+    """Content hash of one edited document plus the render stamp (see _pdf_render_stamp)."""
+    payload = json.dumps(doc_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(f"{payload}|{render_stamp}".encode('utf-8'), digest_size=16).hexdigest()
+
+
+# Serializes read-modify-write of PDF_KEYS_INDEX between concurrent /generate-final requests
+_PDF_KEYS_LOCK = threading.Lock()
+
+
+def _read_pdf_keys() -> Dict[str, str]:
+    try:
+        keys = _read_json(PDF_KEYS_INDEX)
+        return keys if isinstance(keys, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_pdf_keys(new_keys: Dict[str, str]) -> None:
+    """Merge new_keys into PDF_KEYS_INDEX (entries of deleted PDFs are dropped).
+    Written to a tmp file and swapped in with os.replace, like base_customers.json."""
+    with _PDF_KEYS_LOCK:
+        keys = _read_pdf_keys()
+        keys.update(new_keys)
+        keys = {name: key for name, key in keys.items() if os.path.exists(os.path.join(OUTPUT_DIR, name))}
+        tmp = PDF_KEYS_INDEX + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(keys, f, ensure_ascii=False)
+            os.replace(tmp, PDF_KEYS_INDEX)
+        except Exception:
+            pass
+
+
+def _parse_qty_pl(values: List[Any]) -> List[float]:
+    """Parse quantities edited in Polish format ('1\u202f234,5') back to floats; invalid/empty -> 0.0."""
+    if not values:
+        return []
+    s = (pd.Series(values, dtype=object).astype(str)
+         .str.replace('\u202f', '', regex=False)
+         .str.replace(',', '.', regex=False)
+         .str.strip())
+    return pd.to_numeric(s, errors='coerce').fillna(0.0).astype(float).tolist()
+
+
+def _parse_dates_pl(values: List[Any]) -> List[Optional[pd.Timestamp]]:
+    """Parse edited expiry dates back to Timestamps; empty/unparseable -> None.
+    The preview renders dd.mm.yyyy, which is parsed in one vectorized call (day first);
+    anything else the user typed goes through _parse_date_any.
+    """
+    if not values:
+        return []
+    s = pd.Series(values, dtype=object).fillna('').astype(str).str.strip()
+    parsed = pd.to_datetime(s, format='%d.%m.%Y', errors='coerce')
+    out: List[Optional[pd.Timestamp]] = [None if pd.isna(ts) else ts for ts in parsed]
+    for i in ((parsed.isna() & (s != '')).to_numpy()).nonzero()[0]:
+        out[i] = _parse_date_any(s.iat[i])
+    return out
+
+
+# PDF layout is CPU-bound pure Python; independent documents are rendered in worker processes.
+# One pool lives for the whole app so processes (and their imports) are reused across requests.
+_PDF_POOL: Optional[ProcessPoolExecutor] = None
+_PDF_POOL_LOCK = threading.Lock()
+
+
+def _pdf_pool() -> ProcessPoolExecutor:
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is None:
+            # spawn: forking a multi-threaded server process is unsafe (and Windows spawns anyway).
+            # Default max_workers: cpu_count, capped by the executor at 61 on Windows.
+            _PDF_POOL = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+        return _PDF_POOL
+
+
+def _render_pdfs(jobs: List[Tuple[str, List[ReportRow], Dict[str, Any]]]) -> None:
+    """Render (out_path, rows, header) jobs; a single document is rendered in-process."""
+    global _PDF_POOL
+    if len(jobs) == 1:
+        out_path, rows, header = jobs[0]
+        REPORTER.generate_pdf(out_path, rows, header)
+        return
+    pool = None
+    try:
+        pool = _pdf_pool()
+        futures = [pool.submit(render_pdf, CONFIG, out_path, rows, header) for out_path, rows, header in jobs]
+        for fut in futures:
+            fut.result()
+    except BrokenProcessPool:
+        # A worker died (or processes are unavailable); drop the pool and render here instead
+        with _PDF_POOL_LOCK:
+            if _PDF_POOL is pool:
+                _PDF_POOL = None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        for out_path, rows, header in jobs:
+            REPORTER.generate_pdf(out_path, rows, header)
+
+
+# Characters not allowed in Windows filenames, mapped to '_' in one translate() pass
+_FNAME_BAD = str.maketrans({c: '_' for c in '/\\:*?"<>|'})
+_FNAME_BAD_DATE = str.maketrans({c: '_' for c in '/\\:'})
+
+
 @app.route('/generate-final', methods=['POST'])
 def generate_final():
     """Generate PDFs from edited table data."""
@@ -268,11 +603,20 @@ def generate_final():
     if not data or 'documents' not in data:
         return {'success': False, 'error': 'Brak danych'}, 400
     
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
     files: List[str] = []
+    jobs: List[Tuple[str, List[ReportRow], Dict[str, Any]]] = []
+    new_keys: Dict[str, str] = {}
     
     try:
-        for doc_data in data['documents']:
+        documents = data['documents']
+        # Parse quantities and dates of all documents in one vectorized pass; rows are sliced back per document
+        all_rows = [r for d in documents for r in d.get('rows', [])]
+        qtys = _parse_qty_pl([r.get('qty', '0') for r in all_rows])
+        expiries = _parse_dates_pl([r.get('expiry', '') for r in all_rows])
+        pos = 0
+        render_stamp = _pdf_render_stamp()
+        stored_keys = _read_pdf_keys()
+        for doc_data in documents:
             doc_no = doc_data.get('doc_no', '')
             doc_date = doc_data.get('doc_date', '')
             customer_name = doc_data.get('customer_name', '')
@@ -280,23 +624,8 @@ def generate_final():
             
             # Convert back to ReportRow objects
             rows = []
-            for r in rows_data:
-                # Parse quantity back from Polish format
-                qty_str = str(r.get('qty', '0')).replace('\u202f', '').replace(',', '.').strip()
-                try:
-                    qty = float(qty_str) if qty_str else 0.0
-                except:
-                    qty = 0.0
-                
-                # Parse date
-                exp_str = r.get('expiry', '').strip()
-                expiry = None
-                if exp_str:
-                    try:
-                        expiry = _parse_date_any(exp_str)
-                    except:
-                        pass
-                
+            n = len(rows_data)
+            for r, qty, expiry in zip(rows_data, qtys[pos:pos + n], expiries[pos:pos + n]):
                 rows.append(ReportRow(
                     lp=r.get('lp', 0),
                     name=r.get('name', ''),
@@ -306,6 +635,7 @@ def generate_final():
                     expiry=expiry,
                     item_no=r.get('item_no', '')
                 ))
+            pos += n
             
             # Generate PDF
             header = {
@@ -316,14 +646,23 @@ def generate_final():
             
             # Create filename: "Atest do dostawy [nazwa klienta] [data dokumentu] [nr dokumentu].pdf"
             # Sanitize customer name and doc_no for filename
-            safe_customer = customer_name.replace('/', '_').replace('\\', '_').replace(':', '_').replace('*', '_').replace('?', '_').replace('"', '_').replace('<', '_').replace('>', '_').replace('|', '_')
-            safe_doc = doc_no.replace('/', '_').replace('\\', '_').replace(':', '_').replace('*', '_').replace('?', '_').replace('"', '_').replace('<', '_').replace('>', '_').replace('|', '_')
-            safe_date = doc_date.replace('/', '_').replace('\\', '_').replace(':', '_')
+            safe_customer = customer_name.translate(_FNAME_BAD)
+            safe_doc = doc_no.translate(_FNAME_BAD)
+            safe_date = doc_date.translate(_FNAME_BAD_DATE)
             
             filename = f"Atest do dostawy {safe_customer} {safe_date} {safe_doc}.pdf"
             out_path = os.path.join(OUTPUT_DIR, filename)
-            REPORTER.generate_pdf(out_path, rows, header)
+            # Same edited rows + same config => identical PDF; reuse the file from a previous run
+            key = _pdf_cache_key(doc_data, render_stamp)
             files.append(filename)
+            if stored_keys.get(filename) == key and os.path.exists(out_path):
+                continue
+            jobs.append((out_path, rows, header))
+            new_keys[filename] = key
+
+        if jobs:
+            _render_pdfs(jobs)
+            _save_pdf_keys(new_keys)
         
         return {'success': True, 'files': files, 'count': len(files)}
     except Exception as e:
@@ -335,26 +674,79 @@ def define_base_customers():
     if request.method == 'POST':
         selected: List[str] = request.form.getlist('customers')
         _save_base_customers(selected)
-        global BASE_CUSTOMERS
+        global BASE_CUSTOMERS, BASE_CUSTOMERS_SET
         BASE_CUSTOMERS = selected
+        BASE_CUSTOMERS_SET = frozenset(selected)
         flash(f'Zapisano {len(selected)} bazowych klientów.')
         return redirect(url_for('index'))
     
     # Show ALL customers from NazwyKlienci.csv
-    # Sort: first by whether they're selected (checked first), then alphabetically by name
-    all_customer_ids = list(CUSTOMER_NAMES.keys())
-    
-    # Sort by: 1) checked status (True first), 2) customer name alphabetically
-    all_customer_ids.sort(key=lambda cid: (
-        cid not in BASE_CUSTOMERS,  # False (checked) comes before True (unchecked)
-        CUSTOMER_NAMES.get(cid, cid).upper()  # Then alphabetically by name
-    ))
+    # Order: selected (checked) first, then the rest, each alphabetically by name.
+    # The alphabetical order is precomputed, so a linear partition keeps it without re-sorting.
+    all_customer_ids = (
+        [cid for cid in CUSTOMER_NAMES_SORTED_IDS if cid in BASE_CUSTOMERS_SET]
+        + [cid for cid in CUSTOMER_NAMES_SORTED_IDS if cid not in BASE_CUSTOMERS_SET]
+    )
     
-    source_names = {s: CUSTOMER_NAMES.get(s, s) for s in all_customer_ids}
     return render_template('define_base_customers.html', 
                          sources=all_customer_ids, 
-                         source_names=source_names,
-                         base_customers=BASE_CUSTOMERS)
+                         source_names=CUSTOMER_NAMES,
+                         base_customers=BASE_CUSTOMERS_SET)
+
+def _xlsx_cell_text(v: Any) -> str:
+    """Cell value as text, matching pd.read_excel(dtype=str).fillna('')."""
+    if v is None:
+        return ''
+    if isinstance(v, float) and v.is_integer():
+        # pandas reports integral numbers as int (e.g. -19, not -19.0)
+        return str(int(v))
+    return str(v)
+
+
+def _xlsx_to_csv(stream: Any, dst: str) -> None:
+    """Convert the active sheet of an .xlsx to UTF-8-SIG CSV without building a DataFrame.
+    openpyxl read-only mode streams rows, so memory stays flat for large sheets.
+    """
+    from openpyxl import load_workbook
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        header = next(ws.iter_rows(max_row=1, values_only=True), None)
+        if header is None:
+            raise ValueError('Arkusz jest pusty')
+        width = len(header)
+        # Data rows are bounded to the header width so stray cells far to the right are not materialized
+        rows = ws.iter_rows(min_row=2, max_col=width, values_only=True)
+        with open(dst, 'w', encoding='utf-8-sig', newline='') as out:
+            w = csv.writer(out)
+            w.writerow([_xlsx_cell_text(c) for c in header])
+            for row in rows:
+                # Skip blank rows (read-only sheets often report formatted-but-empty ranges)
+                if all(c is None for c in row):
+                    continue
+                cells = [_xlsx_cell_text(c) for c in row]
+                cells.extend([''] * (width - len(cells)))
+                w.writerow(cells)
+    finally:
+        wb.close()
+
+
+def _replace_input_csv(write: Callable[[str], None]) -> None:
+    """Write a new input CSV with write(path) to a tmp file beside INPUT_CSV, check that
+    load_csv parses it, and only then swap it in with os.replace. A bad upload never
+    replaces (or truncates) the current input; the tmp file is removed on failure."""
+    tmp = INPUT_CSV + '.upload.tmp'
+    try:
+        write(tmp)
+        load_csv(tmp)
+        os.replace(tmp, INPUT_CSV)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
 
 @app.route('/upload', methods=['POST'])
 def upload():
@@ -364,38 +756,44 @@ def upload():
         return redirect(url_for('index'))
     filename = secure_filename(f.filename)
     name_lower = filename.lower()
-    tmp_path = os.path.join(OUTPUT_DIR, filename)
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
     try:
-        if name_lower.endswith('.xlsx') or name_lower.endswith('.xls'):
-            # Read Excel and convert to canonical CSV expected by pipeline
+        if name_lower.endswith('.xlsx'):
+            # Stream the sheet into a tmp CSV; it replaces the canonical CSV only once complete
+            _replace_input_csv(lambda path: _xlsx_to_csv(f, path))
+        elif name_lower.endswith('.xls'):
+            # Legacy format is not readable by openpyxl; let pandas pick the engine
             df_x = pd.read_excel(f, dtype=str)
-            # Normalize NaNs to empty strings for parity with load_csv()
-            df_x = df_x.fillna('')
-            df_x.to_csv(INPUT_CSV, index=False, encoding='utf-8-sig')
+            # Empty cells come back as NaN; to_csv writes them as '' (na_rep), matching load_csv()
+            _replace_input_csv(lambda path: df_x.to_csv(path, index=False, encoding='utf-8-sig', na_rep=''))
         elif name_lower.endswith('.csv'):
-            # Save/replace canonical CSV
-            f.save(tmp_path)
-            # Re-encode to UTF-8-SIG to avoid BOM/encoding issues
+            # Save/replace canonical CSV as UTF-8-SIG to avoid BOM/encoding issues.
+            # Only the text encoding changes, so work on the bytes instead of a pandas round trip;
+            # valid UTF-8 is written as-is (BOM added if missing), only cp1250 is re-encoded.
+            raw = f.read()
             try:
-                df_c = pd.read_csv(tmp_path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+                raw.decode('utf-8-sig')  # validate only
+                data = raw
             except UnicodeDecodeError:
                 # Fallback common on Windows exports
-                df_c = pd.read_csv(tmp_path, dtype=str, keep_default_na=False, encoding='cp1250')
-            df_c.to_csv(INPUT_CSV, index=False, encoding='utf-8-sig')
+                data = raw.decode('cp1250').encode('utf-8')
+
+            def _write_csv(path: str) -> None:
+                # Written through as-is into the tmp file; the BOM goes first when missing,
+                # so the upload is not copied once more just to prepend it
+                with open(path, 'wb') as out:
+                    if not data.startswith(codecs.BOM_UTF8):
+                        out.write(codecs.BOM_UTF8)
+                    out.write(data)
+            _replace_input_csv(_write_csv)
         else:
             flash('Nieobsługiwany format. Wgraj .xlsx lub .csv')
             return redirect(url_for('index'))
         flash('Plik został wgrany. Lista źródeł odświeżona.')
+        # mtime resolution may be coarse; never serve the previous upload from cache
+        _load_input_keyed.cache_clear()
         _reload_data()
     except Exception as e:
         flash(f'Błąd wgrywania pliku: {e}')
-    finally:
-        try:
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-        except Exception:
-            pass
     return redirect(url_for('index'))
 
 
@@ -413,8 +811,13 @@ def show_results():
 
 @app.route('/download/<path:filename>')
 def download(filename: str):
-    return send_from_directory(OUTPUT_DIR, filename, as_attachment=True)
+    # PDFs are regenerated under the same name, so always revalidate (ETag/Last-Modified -> 304)
+    return send_from_directory(OUTPUT_DIR, filename, as_attachment=True, conditional=True, max_age=0)
 
 
 if __name__ == '__main__':
-    app.run(host='127.0.0.1', port=5000, debug=True)
+    try:
+        from waitress import serve
+        serve(app, host='127.0.0.1', port=5000, threads=8)
+    except ImportError:
+        app.run(host='127.0.0.1', port=5000, debug=True)
@@ -1,11 +1,16 @@
 from __future__ import annotations
 import os
 import sys
+import csv
+import functools
 import math
 import json
+import re
+from collections.abc import Mapping
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator, AbstractSet, Set
 
+import numpy as np
 import pandas as pd
 from dateutil import parser as dateparser
 from reportlab.lib import colors
@@ -19,6 +24,7 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
+from reportlab.pdfgen import canvas as pdfgen_canvas
 
 
 CSV_COLUMNS = {
@@ -36,6 +42,12 @@ CSV_COLUMNS = {
     "qty": "Ilość",
 }
 
+# Repeated-value columns stored as pandas categoricals after loading
+CATEGORICAL_COLUMNS = ("doc_type", "entry_type", "source_no", "location")
+
+# Nr zapasu whose expiry is always shown as "nie dotyczy" (compared case-insensitively)
+NO_EXPIRY_ITEM_NO = "z00155"
+
 # Possible alternative column names for Unit of Measure if present in CSV
 UOM_ALIASES = [
     "Jednostka miary",
@@ -47,32 +59,36 @@ UOM_ALIASES = [
     "Unit of Measure",
 ]
 
+# Columns load_csv keeps; the export has many more that the app never reads
+LOAD_COLUMNS = frozenset(CSV_COLUMNS.values()) | frozenset(UOM_ALIASES)
+
+
+# Unit spellings (uppercased) -> short codes used in the PDF
+_UOM_CANONICAL = {
+    "KG": "KG",
+    "KILOGRAM": "KG",
+    "KILOGRAMY": "KG",
+    "SZT": "SZT",
+    "SZTUKA": "SZT",
+    "SZTUKI": "SZT",
+    "L": "L",
+    "LITR": "L",
+    "LITRY": "L",
+    "G": "G",
+    "GRAM": "G",
+    "GRAMY": "G",
+    "ML": "ML",
+    "MILILITR": "ML",
+    "MILILITRY": "ML",
+}
+
 
-def _normalize_uom(s: Any) -> str:
-    """Normalize unit strings to consistent uppercase short codes used in the PDF.
-    Examples: KG, SZT, L, G, ML. Fallback to original trimmed uppercased value.
+def _normalize_uom_series(values: pd.Series) -> pd.Series:
+    """Normalize unit strings to the uppercase short codes used in the PDF (KG, SZT, L, G, ML),
+    falling back to the trimmed uppercased value. One strip/upper pass and a Series.map lookup.
     """
-    if s is None:
-        return ""
-    val = str(s).strip().upper()
-    mapping = {
-        "KG": "KG",
-        "KILOGRAM": "KG",
-        "KILOGRAMY": "KG",
-        "SZT": "SZT",
-        "SZTUKA": "SZT",
-        "SZTUKI": "SZT",
-        "L": "L",
-        "LITR": "L",
-        "LITRY": "L",
-        "G": "G",
-        "GRAM": "G",
-        "GRAMY": "G",
-        "ML": "ML",
-        "MILILITR": "ML",
-        "MILILITRY": "ML",
-    }
-    return mapping.get(val, val)
+    val = values.astype(str).str.strip().str.upper()
+    return val.map(_UOM_CANONICAL).fillna(val)
 
 
 def _parse_date_any(s: Any) -> Optional[pd.Timestamp]:
@@ -95,23 +111,205 @@ def _parse_date_any(s: Any) -> Optional[pd.Timestamp]:
             return None
 
 
+def _as_text(values: pd.Series) -> pd.Series:
+    """values for .str ops. Arrow-backed string columns (read_csv_str with PyArrow) are used
+    as they are; astype(str) would box every cell into a Python str first."""
+    if isinstance(values.dtype, pd.StringDtype):
+        return values
+    return values.astype(str)
+
+
+def _parse_dates_series(values: pd.Series) -> pd.Series:
+    """Column-wise _parse_date_any. The export's m/d/Y dates, ISO dates and 8-digit YYYYMMDD
+    are parsed with vectorized pd.to_datetime calls (formats dateutil reads the same way);
+    anything else goes through _parse_date_any once per distinct value.
+    """
+    text = _as_text(values).str.strip()
+    parsed = pd.to_datetime(text, format="%m/%d/%Y", errors="coerce")
+    rest = parsed.isna() & values.notna() & (text != "")
+    for fmt, candidates in (("%Y-%m-%d", text.str.contains("-", regex=False)),
+                            ("%Y%m%d", text.str.fullmatch(r"\d{8}"))):
+        todo = rest & candidates
+        if todo.any():
+            more = pd.to_datetime(text[todo], format=fmt, errors="coerce").dropna()
+            parsed[more.index] = more
+            rest[more.index] = False
+    if rest.any():
+        rest_text = text[rest]
+        lookup = {v: _parse_date_any(v) for v in rest_text.unique()}
+        try:
+            parsed[rest] = pd.to_datetime(rest_text.map(lookup))
+        except (OverflowError, pd.errors.OutOfBoundsDatetime):
+            # Dates outside the datetime64[ns] range: parse cell by cell as before (object column)
+            return values.apply(_parse_date_any)
+    return parsed
+
+
 def load_config(config_path: str) -> Dict[str, Any]:
     with open(config_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
-def load_csv(csv_path: str) -> pd.DataFrame:
+def _read_csv_pyarrow(csv_path: str, encoding: str, usecols: Optional[AbstractSet[str]] = None) -> Optional[pd.DataFrame]:
+    """Read CSV with the (multi-threaded) PyArrow reader, every column as str.
+    Returns None when pyarrow is not installed or the file needs pandas' more lenient parser.
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+    except ImportError:
+        return None
+    try:
+        with open(csv_path, "r", encoding=encoding, newline="") as f:
+            header = next(csv.reader(f), None)
+    except Exception:
+        return None
+    if not header:
+        return None
+    # Mirror pandas' naming of unnamed/duplicate headers ("Unnamed: 3", "Nr zlecenia.1")
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for i, h in enumerate(header):
+        name = h or f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    keep = [i for i, n in enumerate(names) if usecols is None or n in usecols]
+    if not keep:
+        # None of the wanted columns: read everything, like read_csv_str's fallback does
+        usecols, keep = None, list(range(len(names)))
+    # pyarrow selects columns by raw header text, which is only unambiguous without duplicates
+    include = [header[i] for i in keep] if usecols is not None and len(set(header)) == len(header) else None
     try:
-        df = pd.read_csv(
+        # Force string columns so values keep their exact text (leading zeros, "0.00");
+        # empty cells stay "" like keep_default_na=False
+        table = pa_csv.read_csv(
             csv_path,
-            encoding="utf-8-sig",
-            dtype=str,  # read as str, we'll coerce specific fields
-            keep_default_na=False,
+            read_options=pa_csv.ReadOptions(encoding="utf8" if encoding.lower() in {"utf-8", "utf-8-sig"} else encoding),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={h: pa.string() for h in (include if include is not None else header)},
+                include_columns=include,
+                strings_can_be_null=False,
+                quoted_strings_can_be_null=False,
+            ),
         )
-    except pd.errors.EmptyDataError:
-        # File is empty or has no columns - return empty DataFrame
-        return pd.DataFrame()
+        # Arrow-backed strings: cells stay in Arrow buffers instead of one Python str per cell
+        df = table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+    except Exception:
+        return None
+    if include is not None:
+        if len(keep) != len(df.columns):
+            return None
+        df.columns = [names[i] for i in keep]
+        return df
+    if len(names) != len(df.columns):
+        return None
+    df.columns = names
+    if usecols is not None:
+        df = df.iloc[:, keep]
+    return df
+
+
+def read_csv_str(csv_path: str, encoding: str = "utf-8-sig", usecols: Optional[AbstractSet[str]] = None) -> pd.DataFrame:
+    """Read a CSV with all columns as str and no NA conversion ('' stays '').
+    usecols limits the result to those column names (others are skipped while parsing);
+    if the header has none of them, every column is returned.
+    Prefers the PyArrow CSV reader when available, falls back to the pandas C engine.
+    """
+    df = _read_csv_pyarrow(csv_path, encoding, usecols)
+    if df is not None:
+        return df
+    df = pd.read_csv(
+        csv_path,
+        encoding=encoding,
+        dtype=str,  # read as str, we'll coerce specific fields
+        keep_default_na=False,
+        usecols=(lambda c: c in usecols) if usecols is not None else None,
+    )
+    if usecols is not None and len(df.columns) == 0:
+        # Header has none of the wanted columns: return the file as is and let callers complain
+        return read_csv_str(csv_path, encoding)
+    return df
+
+
+def _to_float(v: str) -> float:
+    """Quantity cell to float (spaces/quotes removed, comma as decimal or thousands separator)."""
+    if v is None:
+        return 0.0
+    s = str(v).strip().replace(" ", "")
+    # handle non-breaking space used as thousand separator
+    s = s.replace("\u00a0", "")
+    
+    # Remove quotes if present
+    s = s.strip('"')
     
+    try:
+        return float(s)
+    except Exception:
+        # Detect if comma is thousand separator or decimal separator
+        # If format is like "2,000" or "-2,000" (exactly 3 digits after comma), it's thousands
+        # If format is like "2,5" or "2,50" (1-2 digits after comma), it's decimal
+        if ',' in s:
+            parts = s.replace('-', '').split(',')
+            if len(parts) == 2 and len(parts[1]) == 3:
+                # Likely thousand separator: remove it
+                s = s.replace(',', '')
+            else:
+                # Likely decimal separator: replace with dot
+                s = s.replace(',', '.')
+        
+        try:
+            return float(s)
+        except Exception:
+            return 0.0
+
+
+def _to_float_series(values: pd.Series) -> pd.Series:
+    """Column-wise _to_float. Plain numbers and comma formats ("2,5", "-2,000") are cleaned
+    with .str ops and converted with astype(float) (same float() semantics, in C); only the
+    rest (junk, exotic spellings) goes through _to_float, once per distinct value.
+    """
+    cleaned = (_as_text(values).str.strip()
+               .str.replace(" ", "", regex=False)
+               .str.replace("\u00a0", "", regex=False)
+               .str.strip('"'))
+    ok = pd.to_numeric(cleaned, errors="coerce").notna()
+    result = pd.Series(0.0, index=values.index)
+    try:
+        result[ok] = cleaned[ok].astype(float)
+    except ValueError:
+        ok[:] = False
+    # float() never accepts a comma, so these are exactly _to_float's separator branch:
+    # one comma followed by 3 digits is a thousands separator, otherwise a decimal comma
+    comma = ~ok & cleaned.str.contains(",", regex=False)
+    if comma.any():
+        c = cleaned[comma]
+        unsigned = c.str.replace("-", "", regex=False)
+        thousands = unsigned.str.count(",").eq(1) & (unsigned.str.len() - unsigned.str.find(",")).eq(4)
+        fixed = c.str.replace(",", ".", regex=False).mask(thousands, c.str.replace(",", "", regex=False))
+        comma_ok = pd.to_numeric(fixed, errors="coerce").notna()
+        try:
+            result[comma_ok.index[comma_ok]] = fixed[comma_ok].astype(float)
+            ok[comma_ok.index[comma_ok]] = True
+        except ValueError:
+            pass
+    rest = values[~ok]
+    if not rest.empty:
+        lookup = {v: _to_float(v) for v in rest.unique()}
+        result[~ok] = rest.map(lookup).astype(float)
+    return result
+
+
+# Rows per chunk for load_csv_chunks; bounds the raw string frame held at once
+CSV_CHUNK_ROWS = 200_000
+
+
+def _normalize_csv_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop excluded rows, coerce quantities/dates and add the blank __UOM__ column.
+    Works row by row, so it can be applied to the whole file or to any chunk of it."""
     # If DataFrame is empty (no rows), return it as-is
     if df.empty:
         return df
@@ -120,88 +318,157 @@ def load_csv(csv_path: str) -> pd.DataFrame:
     def get(col_key: str) -> str:
         return CSV_COLUMNS[col_key]
 
-    # Coerce numeric quantity
-    def to_float(v: str) -> float:
-        if v is None:
-            return 0.0
-        s = str(v).strip().replace(" ", "")
-        # handle non-breaking space used as thousand separator
-        s = s.replace("\u00a0", "")
-        
-        # Remove quotes if present
-        s = s.strip('"')
-        
-        try:
-            return float(s)
-        except Exception:
-            # Detect if comma is thousand separator or decimal separator
-            # If format is like "2,000" or "-2,000" (exactly 3 digits after comma), it's thousands
-            # If format is like "2,5" or "2,50" (1-2 digits after comma), it's decimal
-            if ',' in s:
-                parts = s.replace('-', '').split(',')
-                if len(parts) == 2 and len(parts[1]) == 3:
-                    # Likely thousand separator: remove it
-                    s = s.replace(',', '')
-                else:
-                    # Likely decimal separator: replace with dot
-                    s = s.replace(',', '.')
-            
-            try:
-                return float(s)
-            except Exception:
-                return 0.0
+    # Drop excluded rows first (one mask, one copy), so only kept rows get coerced:
+    # document number containing "/KG/" (case-sensitive) or product name (Nazwa) starting with "OP-"
+    doc_col = get("doc_no")
+    name_col = get("name")
+    # Columns are read as str, so no astype(str); non-text cells count as not matching (na=False)
+    mask = np.zeros(len(df), dtype=bool)
+    if doc_col in df.columns:
+        mask |= df[doc_col].str.contains("/KG/", regex=False, na=False).to_numpy(dtype=bool)
+    if name_col in df.columns:
+        mask |= df[name_col].str.startswith("OP-", na=False).to_numpy(dtype=bool)
+    if mask.any():
+        df = df.loc[~mask].copy()
 
-    df[get("qty")] = df[get("qty")].apply(to_float)
+    # Coerce numeric quantity
+    df[get("qty")] = _to_float_series(df[get("qty")])
 
     # Parse dates into ISO strings for consistent output
-    df[get("expiry")] = df[get("expiry")].apply(_parse_date_any)
-    df[get("date_posted")] = df[get("date_posted")].apply(_parse_date_any)
+    df[get("expiry")] = _parse_dates_series(df[get("expiry")])
+    df[get("date_posted")] = _parse_dates_series(df[get("date_posted")])
 
     # Always defer unit resolution to external Jednostki.csv lookup (authoritative).
     # Ignore any in-file unit columns and heuristics; start with blank units.
     df["__UOM__"] = ""
 
-    # Filter out rows where document number contains "/KG/" (case-sensitive)
-    doc_col = get("doc_no")
-    if doc_col in df.columns:
-        mask = df[doc_col].astype(str).str.contains("/KG/", regex=False, na=False)
-        df = df[~mask].copy()
-    
-    # Filter out rows where product name (Nazwa) starts with "OP-"
-    name_col = get("name")
-    if name_col in df.columns:
-        mask = df[name_col].astype(str).str.startswith("OP-", na=False)
-        df = df[~mask].copy()
+    # Low-cardinality text columns as categoricals (codes + small uniques table)
+    for key in CATEGORICAL_COLUMNS:
+        col = get(key)
+        if col in df.columns:
+            df[col] = df[col].astype("category")
 
     return df
 
 
+def load_csv(csv_path: str) -> pd.DataFrame:
+    try:
+        df = read_csv_str(csv_path, usecols=LOAD_COLUMNS)
+    except pd.errors.EmptyDataError:
+        # File is empty or has no columns - return empty DataFrame
+        return pd.DataFrame()
+    return _normalize_csv_frame(df)
+
+
+def load_csv_chunks(csv_path: str, chunksize: int = CSV_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield load_csv's result in row chunks (index continues across chunks), so callers that
+    only keep part of the rows (e.g. one source) never hold the whole file as strings."""
+    try:
+        reader = pd.read_csv(
+            csv_path,
+            encoding="utf-8-sig",
+            dtype=str,
+            keep_default_na=False,
+            usecols=lambda c: c in LOAD_COLUMNS,
+            chunksize=chunksize,
+        )
+    except pd.errors.EmptyDataError:
+        return
+    with reader:
+        for chunk in reader:
+            yield _normalize_csv_frame(chunk)
+
+
+_RE_UOM_KG = re.compile(r"[0-9]+\s*KG|\bKG\b")
+_RE_UOM_L = re.compile(r"\bL\b|\b L\b")
+_RE_UOM_G = re.compile(r"\bG\b")
+_RE_UOM_ML = re.compile(r"\bML\b")
+_RE_UOM_SZT = re.compile(r"\bSZT\b")
+# Item numbers in Jednostki.csv with padded/unpadded variants: 3773, 03773 / Z03773
+_RE_ITEM_4 = re.compile(r"\d{4}")
+_RE_ITEM_5 = re.compile(r"\d{5}")
+_RE_ITEM_Z0 = re.compile(r"Z0\d{4}")
+
+
 def _extract_uom_from_name(name: Any) -> str:
     # Heuristic parse of units present in product name, e.g., "A'10 KG", "A'5L", "0,2KG" etc.
-    import re
     s = str(name or "").upper()
     # Common tokens
     # Detect KG even when adjacent to digits without a leading space (e.g. 5KG, A'5KG, 0,2KG)
-    if " KG" in s or "KG " in s or "KG" in s or re.search(r"[0-9]+\s*KG", s) or re.search(r"\bKG\b", s):
+    if " KG" in s or "KG " in s or "KG" in s or _RE_UOM_KG.search(s):
         return "KG"
-    if re.search(r"\bL\b|\b L\b", s) or " 5L" in s:
+    if _RE_UOM_L.search(s) or " 5L" in s:
         return "L"
-    if " G " in s or re.search(r"\bG\b", s):
+    if " G " in s or _RE_UOM_G.search(s):
         return "G"
-    if " ML" in s or re.search(r"\bML\b", s):
+    if " ML" in s or _RE_UOM_ML.search(s):
         return "ML"
-    if " SZT" in s or re.search(r"\bSZT\b", s):
+    if " SZT" in s or _RE_UOM_SZT.search(s):
         return "SZT"
     # Fallback generic piece
     return "SZT"
 
 
+def find_uom_lookup_file(lookup_csv_path: str) -> Optional[str]:
+    """Return the first existing Jednostki.csv among lookup_csv_path and its known fallback
+    locations (cwd/output, repo root, PyInstaller bundle, data/), or None.
+    """
+    candidates: List[str] = []
+    base = os.path.abspath(os.path.dirname(lookup_csv_path))
+    # Executable directory (frozen) and potential repo root two levels up
+    exec_dir = os.path.dirname(sys.executable)
+    bundle_dir = getattr(sys, '_MEIPASS', None) or exec_dir
+    repo_root_candidate = os.path.abspath(os.path.join(exec_dir, '..', '..'))
+    # Primary: as provided
+    candidates.append(lookup_csv_path)
+    # Fallback: current working dir's output
+    candidates.append(os.path.join(os.getcwd(), 'output', 'Jednostki.csv'))
+    # Fallback: one and two levels up from base (useful when running dist/APApp and file is in project root/output)
+    candidates.append(os.path.abspath(os.path.join(base, '..', 'Jednostki.csv')))
+    candidates.append(os.path.abspath(os.path.join(base, '..', 'output', 'Jednostki.csv')))
+    candidates.append(os.path.abspath(os.path.join(base, '..', '..', 'output', 'Jednostki.csv')))
+    # Repo root output (common when running frozen exe from dist/APApp shortcut)
+    candidates.append(os.path.join(repo_root_candidate, 'output', 'Jednostki.csv'))
+    # Bundled inside PyInstaller (added via --add-data output/Jednostki.csv;output)
+    candidates.append(os.path.join(bundle_dir, 'output', 'Jednostki.csv'))
+    # Also allow 'data/Jednostki.csv' if present (Excel-misnamed)
+    candidates.append(os.path.abspath(os.path.join(base, '..', 'data', 'Jednostki.csv')))
+    candidates.append(os.path.abspath(os.path.join(base, '..', '..', 'data', 'Jednostki.csv')))
+    candidates.append(os.path.join(repo_root_candidate, 'data', 'Jednostki.csv'))
+
+    # Several candidates coincide (e.g. cwd/output and base/../output); stat each location once
+    seen: Set[str] = set()
+    for p in candidates:
+        key = os.path.normcase(os.path.abspath(p)) if p else ""
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        if os.path.exists(p):
+            return p
+    return None
+
+
 def load_uom_lookup(lookup_csv_path: str) -> Dict[str, str]:
     """Load mapping of item number -> unit from a CSV/Excel like output/Jednostki.csv.
     Expects columns: 'Nr' and 'Podst. jednostka miary' (case-insensitive, partial match for 'jednostka').
     Returns dict {Nr: UOM}. If file is missing, tries a few fallback locations relative to the provided path.
     Gracefully returns {} if nothing is found/parsable.
+    The parsed mapping is cached per file version (path, mtime, size) and shared between calls,
+    so callers must treat it as read-only.
     """
+    try:
+        chosen = find_uom_lookup_file(lookup_csv_path)
+        if not chosen:
+            return {}
+        st = os.stat(chosen)
+    except Exception:
+        return {}
+    return _load_uom_lookup_file(os.path.abspath(chosen), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_uom_lookup_file(path: str, mtime_ns: int, size: int) -> Dict[str, str]:
+    """Parse one lookup file; mtime_ns and size only key the cache, so an edited file is re-read."""
     def _try_read_csv(path: str) -> Optional[pd.DataFrame]:
         try:
             return pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
@@ -222,37 +489,10 @@ def load_uom_lookup(lookup_csv_path: str) -> Dict[str, str]:
             return None
 
     try:
-        candidates: List[str] = []
-        base = os.path.abspath(os.path.dirname(lookup_csv_path))
-        # Executable directory (frozen) and potential repo root two levels up
-        exec_dir = os.path.dirname(sys.executable)
-        bundle_dir = getattr(sys, '_MEIPASS', None) or exec_dir
-        repo_root_candidate = os.path.abspath(os.path.join(exec_dir, '..', '..'))
-        # Primary: as provided
-        candidates.append(lookup_csv_path)
-        # Fallback: current working dir's output
-        candidates.append(os.path.join(os.getcwd(), 'output', 'Jednostki.csv'))
-        # Fallback: one and two levels up from base (useful when running dist/APApp and file is in project root/output)
-        candidates.append(os.path.abspath(os.path.join(base, '..', 'Jednostki.csv')))
-        candidates.append(os.path.abspath(os.path.join(base, '..', 'output', 'Jednostki.csv')))
-        candidates.append(os.path.abspath(os.path.join(base, '..', '..', 'output', 'Jednostki.csv')))
-        # Repo root output (common when running frozen exe from dist/APApp shortcut)
-        candidates.append(os.path.join(repo_root_candidate, 'output', 'Jednostki.csv'))
-        # Bundled inside PyInstaller (added via --add-data output/Jednostki.csv;output)
-        candidates.append(os.path.join(bundle_dir, 'output', 'Jednostki.csv'))
-        # Also allow 'data/Jednostki.csv' if present (Excel-misnamed)
-        candidates.append(os.path.abspath(os.path.join(base, '..', 'data', 'Jednostki.csv')))
-        candidates.append(os.path.abspath(os.path.join(base, '..', '..', 'data', 'Jednostki.csv')))
-        candidates.append(os.path.join(repo_root_candidate, 'data', 'Jednostki.csv'))
-
-        chosen: Optional[str] = next((p for p in candidates if p and os.path.exists(p)), None)
-        if not chosen:
-            return {}
-
         # Try CSV first, then Excel if needed
-        df_l = _try_read_csv(chosen)
+        df_l = _try_read_csv(path)
         if df_l is None:
-            df_l = _try_read_excel(chosen)
+            df_l = _try_read_excel(path)
         if df_l is None or df_l.empty:
             return {}
 
@@ -270,37 +510,20 @@ def load_uom_lookup(lookup_csv_path: str) -> Dict[str, str]:
         df_l = df_l[[nr_col, uom_col]].copy()
         df_l.columns = ["Nr", "UOM"]
         df_l["Nr"] = df_l["Nr"].astype(str).str.strip().str.upper()
-        df_l["UOM"] = df_l["UOM"].map(_normalize_uom)
-        mapping: Dict[str, str] = {}
-        import re
-        for _, r in df_l.iterrows():
-            code = r["Nr"]
-            uom = r["UOM"]
-            if not code:
-                continue
-            mapping[code] = uom
-            # If numeric-only (e.g. 3773) create padded variants: Z + zero + code until length 6 (Z0####)
-            if re.fullmatch(r"\d{4,5}", code):
-                digits = code
-                # length 4 -> Z0 + digits (Z0####)
-                if len(digits) == 4:
-                    alt = f"Z0{digits}"  # Z0 + 4 digits => 6 chars
-                    mapping.setdefault(alt, uom)
-                # length 5 -> Z + digits (Z#####)
-                if len(digits) == 5:
-                    alt = f"Z{digits}"   # Z + 5 digits => 6 chars
-                    mapping.setdefault(alt, uom)
-            # If starts with Z and has 5 digits (Z#####) also add variant without leading zero (Z0####) if pattern matches
-            if re.fullmatch(r"Z\d{5}", code):
-                raw = code[1:]
-                if raw.startswith('0') and len(raw) == 5:
-                    # raw = 0#### => produce Z0#### already same code; also add digits-only without leading zero if 0####
-                    mapping.setdefault(raw, uom)
-                # If code like Z03773 add digits-only variant 3773
-                if raw.startswith('0'):
-                    digits4 = raw[1:]
-                    if len(digits4) == 4:
-                        mapping.setdefault(digits4, uom)
+        df_l["UOM"] = _normalize_uom_series(df_l["UOM"])
+        df_l = df_l[df_l["Nr"] != ""].reset_index(drop=True)
+        nr, uom = df_l["Nr"], df_l["UOM"]
+        # Padded/unpadded variants: 4 digits -> Z0####, 5 digits -> Z#####, Z0#### -> 0#### and ####
+        is4 = nr.str.fullmatch(_RE_ITEM_4)
+        is5 = nr.str.fullmatch(_RE_ITEM_5)
+        isz = nr.str.fullmatch(_RE_ITEM_Z0)
+        alt_codes = pd.concat(["Z0" + nr[is4], "Z" + nr[is5], nr[isz].str[1:], nr[isz].str[2:]])
+        alt_uoms = pd.concat([uom[is4], uom[is5], uom[isz], uom[isz]])
+        # Same precedence as filling row by row with setdefault: among variants the first row
+        # wins (dict(zip) keeps the last, hence the reversed row order); a real code always wins.
+        order = np.argsort(alt_codes.index.to_numpy(), kind="stable")[::-1]
+        mapping: Dict[str, str] = dict(zip(alt_codes.to_numpy()[order], alt_uoms.to_numpy()[order]))
+        mapping.update(zip(nr, uom))
         return mapping
     except Exception:
         return {}
@@ -309,14 +532,19 @@ def load_uom_lookup(lookup_csv_path: str) -> Dict[str, str]:
 def apply_uom_lookup(df: pd.DataFrame, lookup: Dict[str, str]) -> pd.DataFrame:
     """Override df["__UOM__"] based on item number mapping when available.
     Does not modify other columns. Returns the same DataFrame (mutates in place).
+    Item numbers repeat across lines, so they are normalised and looked up once per distinct
+    value; the per-row step is a single np.where. Callers skip the call when the lookup is empty.
     """
     try:
         item_col = CSV_COLUMNS["item_no"]
         if not lookup or item_col not in df.columns or "__UOM__" not in df.columns:
             return df
-        mapped = df[item_col].astype(str).str.strip().str.upper().map(lookup)
-        # Prefer mapped non-empty values; otherwise keep existing
-        df["__UOM__"] = mapped.where(mapped.notna() & (mapped != ""), df["__UOM__"])
+        codes, items = pd.factorize(df[item_col])
+        mapped = _as_text(pd.Series(items)).str.strip().str.upper().map(lookup)
+        # Prefer mapped non-empty values; otherwise keep existing (code -1: missing item number)
+        hit = np.append((mapped.notna() & (mapped != "")).to_numpy(dtype=bool), False)
+        values = np.append(mapped.to_numpy(dtype=object), None)
+        df["__UOM__"] = np.where(hit[codes], values[codes], df["__UOM__"].to_numpy(dtype=object))
         return df
     except Exception:
         return df
@@ -328,15 +556,150 @@ def unique_sources(df: pd.DataFrame) -> List[str]:
     col = CSV_COLUMNS["source_no"]
     if col not in df.columns:
         return []
-    vals = sorted({str(x).strip() for x in df[col].tolist() if str(x).strip()})
-    return vals
+    # Strip the distinct values only (a handful of categories), not every row
+    vals = pd.Series(df[col].unique()).astype(str).str.strip()
+    return sorted(vals[vals.ne("")].unique().tolist())
 
 
 def unique_search_names(df: pd.DataFrame) -> List[str]:
     """Return unique values from the 'Opis szukany' column."""
     col = CSV_COLUMNS["search_desc"]
-    vals = sorted({str(x).strip() for x in df[col].tolist() if str(x).strip()})
-    return vals
+    vals = pd.Series(df[col].unique()).astype(str).str.strip()
+    return sorted(vals[vals.ne("")].unique().tolist())
+
+
+# Polish number formatting: thousands separator -> narrow no-break space, decimal point -> comma
+_QTY_PL_TRANS = str.maketrans({",": "\u202f", ".": ","})
+
+
+def find_logo_file(config: Dict[str, Any]) -> Optional[str]:
+    """Return the logo drawn at the top of the PDF: config.logo_path, else logo.png beside
+    the EXE / in the repo root, else the one bundled by PyInstaller; None when there is none.
+    """
+    data_root = (os.path.dirname(sys.executable) if getattr(sys, "_MEIPASS", None) else os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    bundle_root = getattr(sys, "_MEIPASS", None) or data_root
+    configured = str(config.get("logo_path", "")).strip()
+    candidates = [
+        configured if configured else None,
+        os.path.join(data_root, "logo.png"),    # external beside EXE or in repo root
+        os.path.join(bundle_root, "logo.png"),  # bundled via PyInstaller datas
+    ]
+    return next((p for p in candidates if p and os.path.exists(p)), None)
+
+
+@functools.lru_cache(maxsize=1)
+def _resolve_fonts() -> Tuple[str, str]:
+    """Register a Unicode font to render Polish diacritics; returns (regular, bold) font names.
+    Preference order:
+    - Fonts bundled in static/fonts (DejaVuSans.ttf / DejaVuSans-Bold.ttf)
+    - Windows fonts (Arial / Segoe UI)
+    Falls back to Helvetica if none found (may break diacritics).
+    Cached: registration is process-wide in reportlab, so every ReportBuilder shares the result.
+    """
+    base_dir = getattr(sys, '_MEIPASS', None) or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    static_fonts = os.path.join(base_dir, "static", "fonts")
+
+    candidates = [
+        {
+            "regular": os.path.join(static_fonts, "DejaVuSans.ttf"),
+            "bold": os.path.join(static_fonts, "DejaVuSans-Bold.ttf"),
+            "name": "DocFont",
+        },
+        {
+            "regular": os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts", "arial.ttf"),
+            "bold": os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts", "arialbd.ttf"),
+            "name": "DocFont",
+        },
+        {
+            "regular": os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts", "segoeui.ttf"),
+            "bold": os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts", "segoeuib.ttf"),
+            "name": "DocFont",
+        },
+    ]
+
+    for c in candidates:
+        try:
+            if os.path.exists(c["regular"]) and os.path.exists(c["bold"]):
+                # Register under fixed names; skip if already registered
+                registered = set(pdfmetrics.getRegisteredFontNames())
+                if "DocFont" not in registered:
+                    pdfmetrics.registerFont(TTFont("DocFont", c["regular"]))
+                if "DocFont-Bold" not in registered:
+                    pdfmetrics.registerFont(TTFont("DocFont-Bold", c["bold"]))
+                try:
+                    pdfmetrics.registerFontFamily('DocFont', normal='DocFont', bold='DocFont-Bold', italic='DocFont', boldItalic='DocFont-Bold')
+                except Exception:
+                    pass
+                return "DocFont", "DocFont-Bold"
+        except Exception:
+            continue
+    # Fallback to built-in Helvetica (may not render diacritics fully)
+    return "Helvetica", "Helvetica-Bold"
+
+
+@functools.lru_cache(maxsize=4)
+def _build_styles(font_regular: str, font_bold: str):
+    """Stylesheet for the report, built once per font pair. Treated as read-only by callers,
+    so the same sheet is shared by every PDF (and thread) instead of being rebuilt per document."""
+    styles = getSampleStyleSheet()
+    styles["Normal"].fontName = font_regular
+    styles["Normal"].fontSize = 10
+    styles["Normal"].leading = 13
+    styles["Title"].fontName = font_bold
+    styles["Title"].fontSize = 16
+    styles["Title"].leading = 20
+    # Custom lightweight styles
+    styles.add(styles["Normal"].clone("HeaderSmall", fontName=font_regular, fontSize=10, leading=12, alignment=TA_LEFT))
+    styles.add(styles["Normal"].clone("Cell", fontName=font_regular, fontSize=9, leading=11))
+    styles.add(styles["Normal"].clone("CellCenter", fontName=font_regular, fontSize=9, leading=11, alignment=TA_CENTER))
+    styles.add(styles["Normal"].clone("CellRight", fontName=font_regular, fontSize=9, leading=11, alignment=TA_RIGHT))
+    styles.add(styles["Normal"].clone("Footer", fontName=font_regular, fontSize=9, leading=12, alignment=TA_JUSTIFY))
+    return styles
+
+
+@functools.lru_cache(maxsize=4)
+def _table_style(font_regular: str, font_bold: str) -> TableStyle:
+    """Table style shared by all PDFs; only read by Table.setStyle."""
+    return TableStyle([
+        ("GRID", (0,0), (-1,-1), 0.25, colors.grey),
+        ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
+        ("ALIGN", (0,0), (-1,0), "CENTER"),
+        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+        ("LEFTPADDING", (0,0), (-1,-1), 5),
+        ("RIGHTPADDING", (0,0), (-1,-1), 5),
+        ("TOPPADDING", (0,0), (-1,-1), 4),
+        ("BOTTOMPADDING", (0,0), (-1,-1), 4),
+        ("ALIGN", (2,1), (2,-1), "RIGHT"),  # quantity right aligned
+        ("FONT", (0,0), (-1,-1), font_regular, 10),
+        ("FONT", (0,0), (-1,0), font_bold, 10),
+        # Body cells given as plain strings (Lp., expiry date) render like the "CellCenter" paragraphs
+        ("FONT", (0,1), (-1,-1), font_regular, 9, 11),
+        ("ALIGN", (0,1), (0,-1), "CENTER"),
+        ("ALIGN", (5,1), (5,-1), "CENTER"),
+    ])
+
+
+# Output directories already created by generate_pdf in this process (one makedirs per
+# directory rather than per PDF; render_pdf uses a new ReportBuilder for every job)
+_ENSURED_DIRS: Set[str] = set()
+
+
+# Column captions of the PDF table header row
+TABLE_HEADER_TEXTS = (
+    "Lp.",
+    "NAZWA PRODUKTU",
+    "ILOŚĆ",
+    "JEDN. MIARY",
+    "NR PARTII LOT",
+    "DATA MINIMALNEJ TRWAŁOŚCI LUB TERMIN PRZYDATNOŚCI DO SPOŻYCIA",
+)
+
+
+@functools.lru_cache(maxsize=8192)
+def _parsed_paragraph(text: str, style_name: str, font_regular: str, font_bold: str):
+    """Parse constant/repeated Paragraph markup once; returns (text, style, frags) for cheap re-creation."""
+    p = Paragraph(text, _build_styles(font_regular, font_bold)[style_name])
+    return p.text, p.style, p.frags
 
 
 @dataclass
@@ -356,81 +719,47 @@ class ReportBuilder:
         self._ensure_fonts()
 
     def _ensure_fonts(self) -> None:
-        """Register a Unicode font to render Polish diacritics.
-        Preference order:
-        - Fonts bundled in static/fonts (DejaVuSans.ttf / DejaVuSans-Bold.ttf)
-        - Windows fonts (Arial / Segoe UI)
-        Falls back to Helvetica if none found (may break diacritics).
-        """
-        base_dir = getattr(sys, '_MEIPASS', None) or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        static_fonts = os.path.join(base_dir, "static", "fonts")
-
-        candidates = [
-            {
-                "regular": os.path.join(static_fonts, "DejaVuSans.ttf"),
-                "bold": os.path.join(static_fonts, "DejaVuSans-Bold.ttf"),
-                "name": "DocFont",
-            },
-            {
-                "regular": os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts", "arial.ttf"),
-                "bold": os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts", "arialbd.ttf"),
-                "name": "DocFont",
-            },
-            {
-                "regular": os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts", "segoeui.ttf"),
-                "bold": os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts", "segoeuib.ttf"),
-                "name": "DocFont",
-            },
-        ]
-
-        for c in candidates:
-            try:
-                if os.path.exists(c["regular"]) and os.path.exists(c["bold"]):
-                    # Register under fixed names; skip if already registered
-                    registered = set(pdfmetrics.getRegisteredFontNames())
-                    if "DocFont" not in registered:
-                        pdfmetrics.registerFont(TTFont("DocFont", c["regular"]))
-                    if "DocFont-Bold" not in registered:
-                        pdfmetrics.registerFont(TTFont("DocFont-Bold", c["bold"]))
-                    try:
-                        from reportlab.pdfbase.pdfmetrics import registerFontFamily
-                        registerFontFamily('DocFont', normal='DocFont', bold='DocFont-Bold', italic='DocFont', boldItalic='DocFont-Bold')
-                    except Exception:
-                        pass
-                    self.font_regular = "DocFont"
-                    self.font_bold = "DocFont-Bold"
-                    break
-            except Exception:
-                continue
-        else:
-            # Fallback to built-in Helvetica (may not render diacritics fully)
-            self.font_regular = "Helvetica"
-            self.font_bold = "Helvetica-Bold"
+        """Register a Unicode font to render Polish diacritics (resolved once per process)."""
+        self.font_regular, self.font_bold = _resolve_fonts()
 
     def _get_styles(self):
-        styles = getSampleStyleSheet()
-        styles["Normal"].fontName = self.font_regular
-        styles["Normal"].fontSize = 10
-        styles["Normal"].leading = 13
-        styles["Title"].fontName = self.font_bold
-        styles["Title"].fontSize = 16
-        styles["Title"].leading = 20
-        # Custom lightweight styles
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
-        styles.add(styles["Normal"].clone("HeaderSmall", fontName=self.font_regular, fontSize=10, leading=12, alignment=TA_LEFT))
-        styles.add(styles["Normal"].clone("Cell", fontName=self.font_regular, fontSize=9, leading=11))
-        styles.add(styles["Normal"].clone("CellCenter", fontName=self.font_regular, fontSize=9, leading=11, alignment=TA_CENTER))
-        styles.add(styles["Normal"].clone("CellRight", fontName=self.font_regular, fontSize=9, leading=11, alignment=TA_RIGHT))
-        styles.add(styles["Normal"].clone("Footer", fontName=self.font_regular, fontSize=9, leading=12, alignment=TA_JUSTIFY))
-        return styles
+        return _build_styles(self.font_regular, self.font_bold)
+
+    def _static_paragraph(self, text: str, style_name: str) -> Paragraph:
+        """Fresh Paragraph for constant or often repeated text (header/footer, table captions, short cells), reusing the parsed fragments.
+        A new flowable per PDF keeps layout state out of the shared cache."""
+        text, style, frags = _parsed_paragraph(text, style_name, self.font_regular, self.font_bold)
+        return Paragraph(text, style, frags=frags)
 
     @staticmethod
+    @functools.lru_cache(maxsize=4096, typed=True)
     def _format_date_pl(ts: Optional[pd.Timestamp]) -> str:
+        # typed: a datetime equal to a Timestamp must not share its cache entry
         if isinstance(ts, pd.Timestamp):
             return ts.strftime("%d.%m.%Y")
         return ""
 
     @staticmethod
+    def format_date_pl_series(dates: pd.Series) -> pd.Series:
+        """Vectorized _format_date_pl: dd.mm.yyyy for timestamps, "" otherwise."""
+        if pd.api.types.is_datetime64_any_dtype(dates):
+            return dates.dt.strftime("%d.%m.%Y").fillna("")
+        return dates.map(ReportBuilder._format_date_pl)
+
+    @staticmethod
+    def format_qty_pl_series(qty: pd.Series) -> pd.Series:
+        """Vectorized _format_qty_pl over a numeric Series (same output per value)."""
+        n = qty.astype(float)
+        rounded = n.round()
+        is_int = (n - rounded).abs() < 1e-9
+        out = pd.Series("", index=qty.index, dtype=object)
+        out[is_int] = rounded[is_int].astype("int64").map("{:,}".format)
+        frac = ~is_int
+        out[frac] = n[frac].map(lambda v: f"{v:,.3f}".rstrip("0").rstrip("."))
+        return out.str.translate(_QTY_PL_TRANS)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096, typed=True)
     def _format_qty_pl(q: float) -> str:
         # Use thin-space for thousands and comma decimal, trim trailing zeros
         try:
@@ -445,7 +774,9 @@ class ReportBuilder:
         s = s.replace(",", "_").replace(".", ",").replace("_", "\u202f")
         return s
 
-    def build_rows_for_document(self, df: pd.DataFrame) -> List[ReportRow]:
+    def _aggregate_lines(self, df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+        """Sum quantities per report line. keys are extra leading group/sort columns
+        (the document number when aggregating many documents at once)."""
         name_col = CSV_COLUMNS["name"]
         lot_col = CSV_COLUMNS["lot_no"]
         exp_col = CSV_COLUMNS["expiry"]
@@ -453,37 +784,75 @@ class ReportBuilder:
         doc_type_col = CSV_COLUMNS["doc_type"]
         item_col = CSV_COLUMNS["item_no"]
 
-        # Consider only rows of a single document (df already filtered by doc outside)
         # Prefer explicit document type if present to limit to outbound (Wydanie sprzedaży)
-        df_use = df.copy()
-        if doc_type_col in df_use.columns:
-            mask = (df_use[doc_type_col].str.contains("Wydanie sprzedaży", na=False)) | (df_use[qty_col] < 0)
-            df_use = df_use[mask]
+        # No copy: df_use is only read, and groupby below builds its own frame
+        df_use = df
+        if doc_type_col in df.columns:
+            mask = (df[doc_type_col].str.contains("Wydanie sprzedaży", na=False, regex=False)) | (df[qty_col] < 0)
+            if not mask.all():  # usually every line of a sales document matches; keep df then
+                df_use = df.loc[mask]
 
         # Group by Name + Lot + Expiry + Item_no (+ UOM) and sum absolute quantities within the document
-        group_cols = [name_col, lot_col, exp_col, item_col, "__UOM__"]
+        group_cols = keys + [name_col, lot_col, exp_col, item_col, "__UOM__"]
+        # groupby's own key sort already yields the report order (Name -> Lot -> Expiry, ties by
+        # Item_no/UOM, missing values last), so no separate stable sort_values pass is needed
         grouped = (
-            df_use.groupby(group_cols, dropna=False)[qty_col]
+            df_use.groupby(group_cols, dropna=False, observed=True)[qty_col]
             .sum()
             .reset_index()
         )
+        grouped[qty_col] = grouped[qty_col].abs()  # report shows absolute quantities
+        # Strip the text once per column (grouping/sorting above still used the raw values)
+        for col in (name_col, lot_col, item_col, "__UOM__"):
+            grouped[col] = _as_text(grouped[col]).str.strip()
+        return grouped
+
+    def document_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Aggregated lines of one document as a DataFrame: one row per ReportRow, in report
+        order, 0..n-1 index. Columns are the CSV ones plus "__UOM__"; quantities are the
+        absolute per-group sums and name/lot/item/unit text is stripped.
+        """
+        # Consider only rows of a single document (df already filtered by doc outside)
+        return self._aggregate_lines(df, [])
+
+    def documents_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Like document_frame, but for all documents in df with one groupby: lines are
+        ordered by "Nr dokumentu" first, then in report order within each document."""
+        return self._aggregate_lines(df, [CSV_COLUMNS["doc_no"]])
+
+    def _rows_from_frame(self, grouped: pd.DataFrame) -> List[ReportRow]:
+        name_col = CSV_COLUMNS["name"]
+        lot_col = CSV_COLUMNS["lot_no"]
+        exp_col = CSV_COLUMNS["expiry"]
+        qty_col = CSV_COLUMNS["qty"]
+        item_col = CSV_COLUMNS["item_no"]
+
+        # Walk plain column lists instead of iterrows(), which boxes every row into a Series.
+        # tolist() keeps expiry values as pd.Timestamp/NaT, like the row-wise access did.
+        columns = zip(
+            grouped[name_col].tolist(),
+            grouped[lot_col].tolist(),
+            grouped[exp_col].tolist(),
+            grouped[qty_col].astype(float).tolist(),
+            grouped["__UOM__"].tolist(),
+            grouped[item_col].tolist(),
+        )
+        return [
+            ReportRow(lp=lp, name=name, qty=qty, uom=uom, lot_no=lot, expiry=exp, item_no=item_no)
+            for lp, (name, lot, exp, qty, uom, item_no) in enumerate(columns, start=1)
+        ]
 
-        # Stable sorting by Name -> Lot -> Expiry
-        grouped = grouped.sort_values(by=[name_col, lot_col, exp_col], kind="stable")
-
-        rows: List[ReportRow] = []
-        lp = 1
-        for _, r in grouped.iterrows():
-            name = str(r.get(name_col, "")).strip()
-            lot = str(r.get(lot_col, "")).strip()
-            exp = r.get(exp_col)
-            qty = r.get(qty_col, 0.0)
-            qty_pos = abs(float(qty))
-            uom = str(r.get("__UOM__", "")).strip()
-            item_no = str(r.get(item_col, "")).strip()
-            rows.append(ReportRow(lp=lp, name=name, qty=qty_pos, uom=uom, lot_no=lot, expiry=exp, item_no=item_no))
-            lp += 1
-        return rows
+    def build_rows_for_document(self, df: pd.DataFrame) -> List[ReportRow]:
+        return self._rows_from_frame(self.document_frame(df))
+
+    def build_rows_grouped(self, df: pd.DataFrame) -> Dict[str, List[ReportRow]]:
+        """{Nr dokumentu: rows} for every document in df, aggregated in a single groupby."""
+        grouped = self.documents_frame(df)
+        doc_col = CSV_COLUMNS["doc_no"]
+        return {
+            doc_no: self._rows_from_frame(g)
+            for doc_no, g in grouped.groupby(doc_col, sort=False)
+        }
 
     def infer_doc_header(self, df: pd.DataFrame) -> Tuple[str, str]:
         doc_no_col = CSV_COLUMNS["doc_no"]
@@ -491,9 +860,17 @@ class ReportBuilder:
         doc_no = None
         date_str = None
         if doc_no_col in df.columns:
-            doc_no = next((str(v).strip() for v in df[doc_no_col].tolist() if str(v).strip()), "")
+            nos = _as_text(df[doc_no_col]).str.strip()
+            nos = nos[nos.ne("")]
+            doc_no = nos.iloc[0] if not nos.empty else ""
         if date_col in df.columns:
-            dt = next((v for v in df[date_col].tolist() if isinstance(v, pd.Timestamp)), None)
+            dates = df[date_col]
+            if pd.api.types.is_datetime64_any_dtype(dates):
+                # load_csv output: first non-NaT value, no per-row Python scan
+                valid = dates.dropna()
+                dt = valid.iloc[0] if not valid.empty else None
+            else:
+                dt = next((v for v in dates.tolist() if isinstance(v, pd.Timestamp)), None)
             if dt is None:
                 # Try string to parse
                 raw = next((str(v).strip() for v in df[date_col].tolist() if str(v).strip()), "")
@@ -503,7 +880,10 @@ class ReportBuilder:
         return doc_no or "", date_str or ""
 
     def generate_pdf(self, output_path: str, rows: List[ReportRow], header: Dict[str, Any]) -> None:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        out_dir = os.path.dirname(output_path)
+        if out_dir not in _ENSURED_DIRS:
+            os.makedirs(out_dir, exist_ok=True)
+            _ENSURED_DIRS.add(out_dir)
         # Margins (keep current defaults; configurable via config.json -> margins_mm)
         mcfg = self.config.get("margins_mm", {"left": 15, "right": 15, "top": 15, "bottom": 18})
         left_m = float(mcfg.get("left", 15)) * mm
@@ -518,16 +898,8 @@ class ReportBuilder:
 
         story = []
         # Optional logo at the very top (from config.logo_path or <app>/logo.png)
-        data_root = (os.path.dirname(sys.executable) if getattr(sys, "_MEIPASS", None) else os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        bundle_root = getattr(sys, "_MEIPASS", None) or data_root
-        configured = str(self.config.get("logo_path", "")).strip()
-        candidates = [
-            configured if configured else None,
-            os.path.join(data_root, "logo.png"),    # external beside EXE or in repo root
-            os.path.join(bundle_root, "logo.png"),  # bundled via PyInstaller datas
-        ]
-        logo_path = next((p for p in candidates if p and os.path.exists(p)), None)
-        if logo_path and os.path.exists(logo_path):
+        logo_path = find_logo_file(self.config)
+        if logo_path:
             try:
                 img = Image(logo_path)
                 # Fit within a reasonable header box
@@ -540,7 +912,7 @@ class ReportBuilder:
                 pass
         # Header addresses
         for line in self.config.get("company_header", []):
-            story.append(Paragraph(line, styles["HeaderSmall"]))
+            story.append(self._static_paragraph(line, "HeaderSmall"))
         story.append(Spacer(1, 6))
 
         # Title
@@ -562,29 +934,28 @@ class ReportBuilder:
         story.append(Spacer(1, 10))
 
         # Table header and data (with Unit column and readable layout)
-        data = [[
-            Paragraph("Lp.", styles["CellCenter"]),
-            Paragraph("NAZWA PRODUKTU", styles["CellCenter"]),
-            Paragraph("ILOŚĆ", styles["CellCenter"]),
-            Paragraph("JEDN. MIARY", styles["CellCenter"]),
-            Paragraph("NR PARTII LOT", styles["CellCenter"]),
-            Paragraph("DATA MINIMALNEJ TRWAŁOŚCI LUB TERMIN PRZYDATNOŚCI DO SPOŻYCIA", styles["CellCenter"]),
-        ]]
-        # Add rows
+        data = [[self._static_paragraph(text, "CellCenter") for text in TABLE_HEADER_TEXTS]]
+        # Add rows (styles and formatters bound once, not looked up per row)
+        cell, cell_center = styles["Cell"], styles["CellCenter"]
+        fmt_date, fmt_qty = self._format_date_pl, self._format_qty_pl
+        # Lp. and plain expiry dates are short, fixed-width texts that never wrap, so they are
+        # passed as strings and styled by the table. Quantity and unit take few distinct values
+        # across documents; their cells reuse parsed fragments. Names and lots are mostly unique
+        # and may need wrapping, so they are parsed directly.
+        static = self._static_paragraph
         for r in rows:
             # Special handling for z00155: always show "nie dotyczy" in italic
-            if r.item_no.lower() == "z00155":
-                exp_str = "<i>nie dotyczy</i>"
+            if r.item_no.casefold() == NO_EXPIRY_ITEM_NO:
+                exp_cell = static("<i>nie dotyczy</i>", "CellCenter")
             else:
-                exp_str = self._format_date_pl(r.expiry)
-            qty_str = self._format_qty_pl(r.qty)
+                exp_cell = fmt_date(r.expiry)
             data.append([
-                Paragraph(str(r.lp), styles["CellCenter"]),
-                Paragraph(r.name, styles["Cell"]),
-                Paragraph(qty_str, styles["CellRight"]),
-                Paragraph(r.uom, styles["CellCenter"]),
-                Paragraph(r.lot_no, styles["CellCenter"]),
-                Paragraph(exp_str, styles["CellCenter"]),
+                str(r.lp),
+                Paragraph(r.name, cell),
+                static(fmt_qty(r.qty), "CellRight"),
+                static(r.uom, "CellCenter"),
+                Paragraph(r.lot_no, cell_center),
+                exp_cell,
             ])
 
         # Scale column widths to available page width (A4 width minus margins)
@@ -594,70 +965,124 @@ class ReportBuilder:
         total_w = float(sum(weights)) or 1.0
         col_widths = [avail_width_pt * (w / total_w) for w in weights]
         tbl = Table(data, repeatRows=1, colWidths=col_widths)
-        tbl.setStyle(TableStyle([
-            ("GRID", (0,0), (-1,-1), 0.25, colors.grey),
-            ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
-            ("ALIGN", (0,0), (-1,0), "CENTER"),
-            ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-            ("LEFTPADDING", (0,0), (-1,-1), 5),
-            ("RIGHTPADDING", (0,0), (-1,-1), 5),
-            ("TOPPADDING", (0,0), (-1,-1), 4),
-            ("BOTTOMPADDING", (0,0), (-1,-1), 4),
-            ("ALIGN", (2,1), (2,-1), "RIGHT"),  # quantity right aligned
-            ("FONT", (0,0), (-1,-1), self.font_regular, 10),
-            ("FONT", (0,0), (-1,0), self.font_bold, 10),
-        ]))
+        tbl.setStyle(_table_style(self.font_regular, self.font_bold))
         story.append(tbl)
         story.append(Spacer(1, 14))
 
         # Footers
         for ft in self.config.get("footer_texts", []):
-            story.append(Paragraph(ft, styles["Footer"]))
+            story.append(self._static_paragraph(ft, "Footer"))
             story.append(Spacer(1, 6))
 
-        # Build PDF with page numbers using custom canvas
-        from reportlab.pdfgen import canvas as pdfgen_canvas
-        
-        class NumberedCanvas(pdfgen_canvas.Canvas):
-            def __init__(self, *args, **kwargs):
-                pdfgen_canvas.Canvas.__init__(self, *args, **kwargs)
-                self._saved_page_states = []
-                
-            def showPage(self):
-                self._saved_page_states.append(dict(self.__dict__))
-                self._startPage()
-                
-            def save(self):
-                """Add page numbers to all pages"""
-                num_pages = len(self._saved_page_states)
-                for state in self._saved_page_states:
-                    self.__dict__.update(state)
-                    self.draw_page_number(num_pages)
-                    pdfgen_canvas.Canvas.showPage(self)
-                pdfgen_canvas.Canvas.save(self)
-                
-            def draw_page_number(self, page_count):
-                page_num = self._pageNumber
-                if page_count > 1:
-                    text = f"Strona {page_num}/{page_count}"
-                else:
-                    text = f"Strona {page_num}"
-                self.saveState()
-                self.setFont(font_regular, 9)
-                self.drawRightString(A4[0] - right_m, bottom_m - 10, text)
-                self.restoreState()
-        
-        # Need to pass font to canvas
-        font_regular = self.font_regular
-        
-        doc.build(story, canvasmaker=NumberedCanvas)
+        # Build PDF with page numbers; pages are written as they are laid out
+        doc.build(story, canvasmaker=functools.partial(
+            _NumberedCanvas, page_label_font=self.font_regular, page_label_x=A4[0] - right_m, page_label_y=bottom_m - 10))
+
+
+class _NumberedCanvas(pdfgen_canvas.Canvas):
+    """Canvas adding "Strona n/N" (or "Strona n" for one page) to every page.
+    Each page only references a form XObject with its label; the forms are filled in on
+    save(), once the page count is known, so finished pages are not held back and replayed.
+    """
+
+    def __init__(self, *args, page_label_font: str = "Helvetica", page_label_x: float = 0.0,
+                 page_label_y: float = 0.0, **kwargs):
+        pdfgen_canvas.Canvas.__init__(self, *args, **kwargs)
+        self._page_label_font = page_label_font
+        self._page_label_x = page_label_x
+        self._page_label_y = page_label_y
+        self._page_count = 0
+
+    def showPage(self):
+        self._page_count += 1
+        self.doForm(f"pageLabel{self._page_count}")
+        pdfgen_canvas.Canvas.showPage(self)
+
+    def save(self):
+        """Add page numbers to all pages"""
+        page_count = self._page_count
+        for page_num in range(1, page_count + 1):
+            if page_count > 1:
+                text = f"Strona {page_num}/{page_count}"
+            else:
+                text = f"Strona {page_num}"
+            self.beginForm(f"pageLabel{page_num}")
+            self.setFont(self._page_label_font, 9)
+            self.drawRightString(self._page_label_x, self._page_label_y, text)
+            self.endForm()
+        pdfgen_canvas.Canvas.save(self)
+
+
+def render_pdf(config: Dict[str, Any], output_path: str, rows: List[ReportRow], header: Dict[str, Any]) -> str:
+    """Render one PDF with a fresh ReportBuilder and return its path.
+    Module-level (and in this light module) so process pool workers can import it cheaply.
+    """
+    ReportBuilder(config).generate_pdf(output_path, rows, header)
+    return output_path
 
 
 def filter_by_sources(df: pd.DataFrame, sources: List[str]) -> pd.DataFrame:
+    """Rows of df whose Nr źródła is in sources. The mask selection already returns new data,
+    so no extra copy is made; callers that add or overwrite columns should copy first."""
     col = CSV_COLUMNS["source_no"]
-    return df[df[col].isin(sources)].copy()
+    return df[df[col].isin(sources)]
+
+
+class DocumentFrames(Mapping):
+    """Read-only {Nr dokumentu: rows of that document} over one DataFrame.
+    Only row positions are stored per document; the frame itself is taken on first access,
+    so building the index does not construct thousands of small DataFrames up front.
+    """
+
+    def __init__(self, df: pd.DataFrame, positions: Dict[str, np.ndarray]):
+        self._df = df
+        self._positions = positions
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    def __getitem__(self, doc_no: str) -> pd.DataFrame:
+        frame = self._frames.get(doc_no)
+        if frame is None:
+            frame = self._df.take(self._positions[doc_no])
+            self._frames[doc_no] = frame
+        return frame
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, doc_no: object) -> bool:
+        return doc_no in self._positions
+
+
+def group_by_document(df: pd.DataFrame) -> Mapping:
+    """Split df once into {Nr dokumentu: rows of that document} for hashed per-document access.
+    One factorize + stable sort, then np.split of the row positions (documents in order of first
+    appearance, rows in file order), instead of a per-group groupby iteration.
+    """
+    col = CSV_COLUMNS["doc_no"]
+    if df.empty or col not in df.columns:
+        return {}
+    codes, doc_nos = pd.factorize(df[col], sort=False)
+    rows = np.flatnonzero(codes >= 0)  # like groupby, rows without a document number are dropped
+    codes = codes[rows]
+    order = rows[np.argsort(codes, kind="stable")]
+    bounds = np.cumsum(np.bincount(codes, minlength=len(doc_nos)))[:-1]
+    return DocumentFrames(df, dict(zip(doc_nos.tolist(), np.split(order, bounds))))
+
+
+def documents_by_source(df: pd.DataFrame) -> Dict[str, List[str]]:
+    """Return {Nr źródła: [Nr dokumentu, ...]} (documents sorted) for the whole df."""
+    src_col = CSV_COLUMNS["source_no"]
+    doc_col = CSV_COLUMNS["doc_no"]
+    if df.empty or src_col not in df.columns or doc_col not in df.columns:
+        return {}
+    pairs = df[[src_col, doc_col]].drop_duplicates()
+    return {src: sorted(docs.tolist()) for src, docs in pairs.groupby(src_col, sort=False, observed=True)[doc_col]}
 
 
 def filter_by_search_names(df: pd.DataFrame, names: List[str]) -> pd.DataFrame:
+    """Rows of df whose Opis szukany is in names (same no-copy contract as filter_by_sources)."""
     col = CSV_COLUMNS["search_desc"]
-    return df[df[col].isin(names)].copy()
+    return df[df[col].isin(names)]